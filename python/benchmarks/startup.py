@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas",)
+PROBE = """
+import io
+import json
+import sys
+
+sys.path.insert(0, sys.argv[1])
+import metrics
+
+metric = metrics.parse_args(sys.argv[2:])
+metric.write(io.StringIO(), metric.calculate())
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", metavar="N", type=int, default=10)
+    parser.add_argument("--max-seconds", metavar="SECONDS", type=float)
+    parser.add_argument("--allow", metavar="MODULE", action="append", default=[])
+    parser.add_argument("spec", metavar="METRIC OPTION", nargs=argparse.REMAINDER)
+    return parser.parse_args(args)
+
+
+def get_imported_modules(spec):
+    process = subprocess.run((sys.executable, "-c", PROBE, ROOT, *spec), stdout=subprocess.PIPE, check=True)
+    return json.loads(process.stdout)
+
+
+def get_times(spec, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run((sys.executable, os.path.join(ROOT, "calculate.py"), *spec), stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    args = parse_args()
+    modules = get_imported_modules(args.spec)
+    heavy = [
+        module for module in HEAVY_MODULES
+        if module not in args.allow and module in modules
+    ]
+    times = get_times(args.spec, args.repeat)
+    median = statistics.median(times)
+    print(json.dumps({
+        "spec": args.spec,
+        "repeat": args.repeat,
+        "min": min(times),
+        "median": median,
+        "heavy_modules": heavy
+    }))
+    if heavy or (args.max_seconds is not None and median > args.max_seconds):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import metrics
+import polyworld as pw
+from graph import get_distances, get_length_matrix
+from metrics.base import IndividualMetric, Series
+from metrics.modularity import Partition
+from . import synthetic
+
+BRAIN_SIZES = (
+    (30, 300),
+    (60, 800),
+    (120, 3000),
+    (240, 12000)
+)
+POPULATION_SIZES = (1000, 10000, 50000)
+QUICK_BRAIN_SIZES = BRAIN_SIZES[:2]
+QUICK_POPULATION_SIZES = POPULATION_SIZES[:1]
+VARIANTS = (
+    (False, False),
+    (True, False),
+    (False, True)
+)
+BRAIN_AGENT_COUNT = 20
+METRIC_SPECS = (
+    ("Density",),
+    ("SynapseCount",),
+    ("NeuronCount",),
+    ("Weight", "birth"),
+    ("Efficiency", "global", "birth"),
+    ("Efficiency", "global", "birth", "--samples", "10"),
+    ("Efficiency", "local", "birth"),
+    ("Modularity", "birth"),
+    ("Gene", "Size"),
+    ("EventCount", "BIRTH"),
+    ("Lifespan",),
+    ("Population",)
+)
+
+
+def clear_caches():
+    pw.get_event_index.cache_clear()
+    pw.get_brain_index.cache_clear()
+    pw.get_synapse_store.cache_clear()
+
+
+def measure(function, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        clear_caches()
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+class Suite:
+    def __init__(self, directory, repeat):
+        self.directory = directory
+        self.repeat = repeat
+        self.results = []
+
+    def add(self, name, parameters, function, setup=None):
+        times = measure(function, self.repeat, setup)
+        self.results.append({
+            "name": name,
+            "parameters": parameters,
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times)
+        })
+        print(f"{name} {json.dumps(parameters)} {min(times):.6f}", file=sys.stderr)
+
+    def make_run(self, name, **kwargs):
+        return synthetic.make_run(os.path.join(self.directory, name), **kwargs)
+
+    def run_brains(self, neuron_count, synapse_count, compress, ingested):
+        run = self.make_run(
+            get_run_name(f"brains_{neuron_count}_{synapse_count}", compress, ingested),
+            agent_count=BRAIN_AGENT_COUNT,
+            neuron_count=neuron_count,
+            synapse_count=synapse_count,
+            compress=compress,
+            ingested=ingested)
+        parameters = {
+            "neurons": neuron_count,
+            "synapses": synapse_count,
+            "gzip": compress,
+            "ingested": ingested,
+            "agents": BRAIN_AGENT_COUNT
+        }
+        agents = pw.get_agents(run)
+        self.add("Brain.read", parameters, lambda: [pw.Brain.read(run, agent) for agent in agents])
+        if compress:
+            return
+        if ingested:
+            self.run_brain_metrics(run, neuron_count, synapse_count, ingested)
+            return
+        body = pw.read(pw.paths.synapses(run, 1, pw.Stage.BIRTH)).partition(b"\n")[2]
+        self.add("Synapses.parse", {**parameters, "agents": 1}, lambda: pw.Synapses.parse(body))
+        brain = pw.Brain.read(run, 1)
+        lengths = brain.weights.get_lengths()
+        parameters = {"neurons": neuron_count, "synapses": brain.synapse_count}
+        self.add("LengthGraph.get_distances", parameters, lengths.get_distances)
+        matrix = get_length_matrix(brain.get_weight_matrix())
+        self.add("get_distances", parameters, lambda: get_distances(matrix))
+        synapses = brain.synapses
+
+        def optimize():
+            random.seed(0)
+            Partition(brain.neuron_count, synapses.pre_neurons, synapses.post_neurons, np.abs(synapses.weights)).optimize()
+
+        self.add("Partition.optimize", parameters, optimize)
+        self.run_brain_metrics(run, neuron_count, synapse_count, ingested)
+
+    def run_brain_metrics(self, run, neuron_count, synapse_count, ingested):
+        for spec in METRIC_SPECS:
+            if spec[0] in ("EventCount", "Lifespan", "Population"):
+                continue
+            self.run_metric(run, spec, {"neurons": neuron_count, "synapses": synapse_count, "ingested": ingested})
+
+    def run_population(self, agent_count, compress, ingested):
+        run = self.make_run(
+            get_run_name(f"population_{agent_count}", compress, ingested),
+            agent_count=agent_count,
+            initial_agent_count=max(2, agent_count // 20),
+            end_time=agent_count * 2,
+            gene_count=1,
+            stages=(),
+            compress=compress,
+            ingested=ingested)
+        parameters = {"agents": agent_count, "gzip": compress, "ingested": ingested}
+        if ingested:
+            self.add("EventIndex.read", parameters, lambda: pw.EventIndex.read(run))
+        else:
+            self.add("EventIndex.read_text", parameters, lambda: pw.EventIndex.read_text(run))
+        self.add("parse LifeSpans", parameters, lambda: list(pw.parse(pw.paths.lifespans(run), "LifeSpans").rows()))
+        if compress:
+            return
+        rng = np.random.default_rng(0)
+        series = Series(zip(pw.get_agents(run), rng.random(agent_count).tolist()), IndividualMetric.index_name)
+        self.add("IndividualMetric._group", parameters, lambda: [len(values) for _, values in IndividualMetric._group(run, series)])
+        self.add("IndividualMetric.aggregate", parameters, lambda: IndividualMetric.aggregate(run, series))
+        for spec in METRIC_SPECS:
+            if spec[0] in ("EventCount", "Lifespan", "Population"):
+                self.run_metric(run, spec, parameters)
+
+    def run_metric(self, run, spec, parameters):
+        metric = metrics.parse_args([spec[0], run, *spec[1:]])
+        def clear_genomes():
+            if os.path.exists(pw.paths.genomes(run)):
+                os.remove(pw.paths.genomes(run))
+            metric.loader.clear()
+
+        setup = None
+        if spec[0] == "Gene":
+            setup = clear_genomes
+        elif isinstance(metric, IndividualMetric):
+            setup = metric.loader.clear
+        self.add(" ".join(("metric", *spec)), parameters, metric.calculate, setup)
+
+
+def get_run_name(prefix, compress, ingested):
+    return f"{prefix}_{'gz' if compress else 'txt'}{'_ingested' if ingested else ''}"
+
+
+def get_commit():
+    try:
+        process = subprocess.run(
+            ("git", "rev-parse", "HEAD"),
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return process.stdout.decode().strip()
+
+
+def get_key(result):
+    return result["name"], json.dumps(result["parameters"], sort_keys=True)
+
+
+def compare(baseline, results, file):
+    medians = {get_key(result): result["median"] for result in baseline["results"]}
+    for result in results:
+        key = get_key(result)
+        if key not in medians:
+            continue
+        ratio = result["median"] / medians[key]
+        file.write(f"{key[0]} {key[1]} {medians[key]:.6f} {result['median']:.6f} {ratio:.2f}\n")
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", metavar="N", type=int, default=3)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--directory", metavar="DIRECTORY")
+    parser.add_argument("--output", metavar="FILE")
+    parser.add_argument("--baseline", metavar="FILE")
+    return parser.parse_args(args)
+
+
+def main():
+    args = parse_args()
+    directory = args.directory or tempfile.mkdtemp()
+    suite = Suite(directory, args.repeat)
+    try:
+        for neuron_count, synapse_count in QUICK_BRAIN_SIZES if args.quick else BRAIN_SIZES:
+            for compress, ingested in VARIANTS:
+                suite.run_brains(neuron_count, synapse_count, compress, ingested)
+        for agent_count in QUICK_POPULATION_SIZES if args.quick else POPULATION_SIZES:
+            for compress, ingested in VARIANTS:
+                suite.run_population(agent_count, compress, ingested)
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory, ignore_errors=True)
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "repeat": args.repeat,
+        "results": suite.results
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            compare(json.load(f), suite.results, sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import gzip
+import io
+import os
+
+import numpy as np
+
+import ingest
+import polyworld as pw
+
+GENE_NAMES = ("Strength", "Size", "MutationRate", "Bias")
+
+
+def write_text(path, text, compress):
+    if compress:
+        with gzip.open(f"{path}.gz", "wt") as f:
+            f.write(text)
+    else:
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def format_table(table_name, names, types, rows):
+    lines = [
+        "%datalib v1",
+        f"# BEGIN TABLE {table_name}",
+        f"# COLNAMES {' '.join(names)}",
+        f"# COLTYPES {' '.join(types)}"
+    ]
+    lines.extend(" ".join(map(str, row)) for row in rows)
+    lines.append(f"# END TABLE {table_name}")
+    return "\n".join(lines) + "\n"
+
+
+def write_table(path, table_name, columns, types, compress):
+    names = list(columns)
+    rows = zip(*(columns[name].tolist() for name in names))
+    write_text(path, format_table(table_name, names, types, rows), compress)
+
+
+def get_lifespans(rng, agent_count, initial_agent_count, end_time):
+    births = np.zeros(agent_count, dtype=np.int64)
+    births[initial_agent_count:] = np.sort(rng.integers(1, end_time + 1, agent_count - initial_agent_count))
+    deaths = births + rng.integers(1, max(2, end_time // 4), agent_count)
+    return births, deaths
+
+
+def get_parents(rng, births, deaths, agent):
+    time = births[agent]
+    alive = np.flatnonzero((births[:agent] <= time) & (deaths[:agent] > time))
+    if len(alive) < 2:
+        return None
+    return tuple((rng.choice(alive, 2, replace=False) + 1).tolist())
+
+
+def write_events(run, rng, births, deaths, initial_agent_count, end_time, compress):
+    events = []
+    for agent in range(initial_agent_count, len(births)):
+        parents = get_parents(rng, births, deaths, agent)
+        if parents is None:
+            events.append((births[agent], 0, f"{births[agent]} CREATION {agent + 1}"))
+        else:
+            events.append((births[agent], 0, f"{births[agent]} BIRTH {agent + 1} {parents[0]} {parents[1]}"))
+    for agent in np.flatnonzero(deaths <= end_time).tolist():
+        events.append((deaths[agent], 1, f"{deaths[agent]} DEATH {agent + 1}"))
+    events.sort(key=lambda event: event[:2])
+    write_text(pw.paths.events(run), "% Time Event Agent Parent1 Parent2\n" + "".join(f"{line}\n" for _, _, line in events), compress)
+
+
+def write_lifespans(run, births, deaths, initial_agent_count, end_time, compress):
+    agent_count = len(births)
+    columns = {
+        "Agent": np.arange(1, agent_count + 1),
+        "BirthStep": births,
+        "BirthReason": np.where(np.arange(agent_count) < initial_agent_count, "SIMINIT", "NATURAL"),
+        "DeathStep": np.minimum(deaths, end_time),
+        "DeathReason": np.where(deaths <= end_time, "NATURAL", "SIMEND")
+    }
+    write_table(pw.paths.lifespans(run), "LifeSpans", columns, ("int", "int", "string", "int", "string"), compress)
+
+
+def write_population(run, births, deaths, end_time, compress):
+    times = np.arange(1, end_time + 1)
+    counts = np.searchsorted(np.sort(births), times, "right") - np.searchsorted(np.sort(deaths), times, "right")
+    write_table(pw.paths.population(run), "Population", {"T": times, "Population": counts}, ("int", "int"), compress)
+
+
+def format_synapses(rng, agent, neuron_count, input_neuron_count, output_neuron_count, synapse_count, weight_max):
+    pre_neurons = rng.integers(0, neuron_count, synapse_count)
+    post_neurons = rng.integers(input_neuron_count, neuron_count - 1, synapse_count)
+    post_neurons[post_neurons >= pre_neurons] += 1
+    weights = rng.uniform(-weight_max, weight_max, synapse_count)
+    learning_rates = rng.uniform(-1.0, 1.0, synapse_count)
+    file = io.StringIO()
+    file.write(
+        f"synapses {agent} maxweight={weight_max} numsynapses={synapse_count} numneurons={neuron_count} "
+        f"numinputneurons={input_neuron_count} numoutputneurons={output_neuron_count}\n")
+    np.savetxt(file, np.column_stack((pre_neurons, post_neurons, weights, learning_rates)), fmt=("%d", "%d", "%.6f", "%.6f"))
+    return file.getvalue()
+
+
+def write_brains(run, rng, agent_count, neuron_count, synapse_count, stages, compress):
+    os.makedirs(os.path.dirname(pw.paths.synapses(run, 1, pw.Stage.BIRTH)), exist_ok=True)
+    input_neuron_count = max(1, neuron_count // 4)
+    output_neuron_count = max(1, neuron_count // 8)
+    for agent in range(1, agent_count + 1):
+        for stage in stages:
+            text = format_synapses(
+                rng, agent, neuron_count, input_neuron_count, output_neuron_count, synapse_count, 4.5)
+            write_text(pw.paths.synapses(run, agent, stage), text, compress)
+
+
+def write_genomes(run, rng, agent_count, gene_count, compress):
+    os.makedirs(os.path.dirname(pw.paths.genome(run, 1)), exist_ok=True)
+    os.makedirs(os.path.dirname(pw.paths.gene_indices(run)), exist_ok=True)
+    lines = "".join(f"{GENE_NAMES[index % len(GENE_NAMES)]}_{index}\n" for index in range(gene_count))
+    write_text(pw.paths.gene_indices(run), lines, False)
+    for agent in range(1, agent_count + 1):
+        genes = rng.integers(0, 256, gene_count)
+        write_text(pw.paths.genome(run, agent), "".join(f"{gene}\n" for gene in genes.tolist()), compress)
+
+
+def make_run(
+        run,
+        agent_count=100,
+        initial_agent_count=20,
+        end_time=1000,
+        neuron_count=60,
+        synapse_count=800,
+        gene_count=100,
+        stages=(pw.Stage.BIRTH,),
+        compress=False,
+        seed=0,
+        ingested=False):
+    rng = np.random.default_rng(seed)
+    os.makedirs(run, exist_ok=True)
+    with open(pw.paths.end_time(run), "w") as f:
+        f.write(f"{end_time}\n")
+    births, deaths = get_lifespans(rng, agent_count, initial_agent_count, end_time)
+    write_events(run, rng, births, deaths, initial_agent_count, end_time, compress)
+    write_lifespans(run, births, deaths, initial_agent_count, end_time, compress)
+    write_population(run, births, deaths, end_time, compress)
+    write_brains(run, rng, agent_count, neuron_count, synapse_count, stages, compress)
+    write_genomes(run, rng, agent_count, gene_count, compress)
+    if ingested:
+        ingest.ingest(run)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", metavar="N", type=int, default=100)
+    parser.add_argument("--initial-agents", metavar="N", type=int, default=20)
+    parser.add_argument("--end-time", metavar="T", type=int, default=1000)
+    parser.add_argument("--neurons", metavar="N", type=int, default=60)
+    parser.add_argument("--synapses", metavar="N", type=int, default=800)
+    parser.add_argument("--genes", metavar="N", type=int, default=100)
+    parser.add_argument("--stage", metavar="STAGE", action="append", choices=tuple(stage.value for stage in pw.Stage))
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--seed", metavar="SEED", type=int, default=0)
+    parser.add_argument("--ingest", action="store_true")
+    parser.add_argument("run", metavar="RUN")
+    args = parser.parse_args()
+    make_run(
+        args.run,
+        args.agents,
+        args.initial_agents,
+        args.end_time,
+        args.neurons,
+        args.synapses,
+        args.genes,
+        tuple(pw.Stage(stage) for stage in args.stage or (pw.Stage.BIRTH.value,)),
+        args.gzip,
+        args.seed,
+        args.ingest)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,52 @@
+import cProfile
+import os
 import sys
+import time
 
 import metrics
+import polyworld as pw
+
+
+def write_instrumentation(path, elapsed):
+    if path == "-":
+        print(f"total={elapsed:.3f} {pw.instrumentation}", file=sys.stderr)
+        return
+    pw.instrumentation.times["total"] = elapsed
+    with open(path, "w") as f:
+        pw.instrumentation.write(f)
 
 
 def main():
+    if metrics.is_batch_args():
+        main_batch()
+        return
     metric = metrics.parse_args()
-    series = metric.calculate()
-    metric.write(sys.stdout, series)
+    pw.instrumentation.enabled = metric.arguments.get("instrument") is not None
+    profiler = None
+    if metric.arguments.get("profile") is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    output = metric.arguments.get("output")
+    start = time.perf_counter()
+    series = metric.calculate() if output is None else metric.stream(output)
+    elapsed = time.perf_counter() - start
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(metric.arguments["profile"])
+    if output is None:
+        metric.write(sys.stdout.buffer if metric.is_binary() else sys.stdout, series)
+    if metric.arguments.get("io_statistics"):
+        print(pw.io_statistics, file=sys.stderr)
+    if pw.instrumentation.enabled:
+        write_instrumentation(metric.arguments["instrument"], elapsed)
+
+
+def main_batch():
+    directory, jobs, prefetch, metrics_ = metrics.parse_batch_args()
+    os.makedirs(directory, exist_ok=True)
+    for index, (metric, series) in enumerate(zip(metrics_, metrics.calculate(metrics_, jobs, prefetch))):
+        with metric.open_output(os.path.join(directory, f"{index}_{type(metric).__name__}{metric.get_extension()}")) as f:
+            metric.write(f, series)
 
 
 if __name__ == "__main__":
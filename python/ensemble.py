@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+
+import metrics
+from metrics.base import Series, parse_run_arg
+
+SEPARATOR = "+"
+
+
+def parse_args(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    usage = f"%(prog)s [--jobs N] [--prefetch N] [--output DIRECTORY] RUN... {SEPARATOR} METRIC OPTION..."
+    parser = argparse.ArgumentParser(usage=usage)
+    parser.add_argument("--jobs", metavar="N", type=metrics.parse_jobs_arg, default=1)
+    parser.add_argument("--prefetch", metavar="N", type=metrics.parse_prefetch_arg, default=0)
+    parser.add_argument("--output", metavar="DIRECTORY")
+    parser.add_argument("runs", metavar="RUN", nargs="+", type=parse_run_arg)
+    if SEPARATOR not in args:
+        parser.print_usage(sys.stderr)
+        raise SystemExit(1)
+    index = args.index(SEPARATOR)
+    ensemble_args = parser.parse_args(args[:index])
+    spec = args[index + 1:]
+    metrics_ = [metrics.parse_args([*spec[:1], run, *spec[1:]], metrics.SPEC_EXCLUDED_OPTIONS) for run in ensemble_args.runs]
+    return ensemble_args, metrics_
+
+
+def get_file_name(run, extension=".txt"):
+    return os.path.normpath(run).replace(os.sep, "_").strip("_") + extension
+
+
+def main():
+    args, metrics_ = parse_args()
+    serieses = metrics.calculate(metrics_, args.jobs, args.prefetch)
+    if args.output is None:
+        observations = (((run, key), value) for run, series in zip(args.runs, serieses) for key, value in series.items())
+        file = sys.stdout.buffer if metrics_[0].is_binary() else sys.stdout
+        metrics_[0].write(file, Series(observations, ("run", serieses[0].index_name)))
+        return
+    os.makedirs(args.output, exist_ok=True)
+    for run, metric, series in zip(args.runs, metrics_, serieses):
+        with metric.open_output(os.path.join(args.output, get_file_name(run, metric.get_extension()))) as f:
+            metric.write(f, series)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,254 @@
 import functools
+import heapq
 import math
 import operator
 
+import numpy as np
+
+DENSITY_THRESHOLD = 0.005
+
+
+def get_sparse_distances(lengths, sources=None):
+    count = len(lengths)
+    if sources is None:
+        sources = range(count)
+    neighbors = []
+    for i in range(count):
+        js = np.flatnonzero(np.isfinite(lengths[i]))
+        neighbors.append(list(zip(js.tolist(), lengths[i, js].tolist())))
+    distances = np.empty((len(sources), count))
+    for row, i in enumerate(sources):
+        distances_i = [math.inf] * count
+        distances_i[i] = 0.0
+        heap = [(0.0, i)]
+        while heap:
+            distance_ij, j = heapq.heappop(heap)
+            if distance_ij > distances_i[j]:
+                continue
+            for k, length_jk in neighbors[j]:
+                distance_ijk = distance_ij + length_jk
+                if distance_ijk < distances_i[k]:
+                    distances_i[k] = distance_ijk
+                    heapq.heappush(heap, (distance_ijk, k))
+        distances[row] = distances_i
+    return distances
+
+
+def get_dense_source_distances(lengths, sources):
+    rows = np.arange(len(sources))
+    distances = np.full((len(sources), len(lengths)), math.inf)
+    distances[rows, sources] = 0.0
+    visited = np.zeros(distances.shape, dtype=bool)
+    for _ in range(len(lengths)):
+        js = np.argmin(np.where(visited, math.inf, distances), axis=1)
+        visited[rows, js] = True
+        np.minimum(distances, distances[rows, js, np.newaxis] + lengths[js], out=distances)
+    return distances
+
+
+def get_dense_distances(lengths, sources=None):
+    if sources is not None:
+        return get_dense_source_distances(lengths, np.asarray(sources))
+    distances = lengths.copy()
+    np.fill_diagonal(distances, 0.0)
+    for k in range(len(distances)):
+        np.minimum(distances, distances[:, k, np.newaxis] + distances[k], out=distances)
+    return distances
+
+
+def get_length_matrix(weights):
+    lengths = np.full(weights.shape, math.inf)
+    np.divide(1.0, np.abs(weights), out=lengths, where=weights != 0.0)
+    return lengths
+
+
+def get_distances(lengths, sources=None):
+    count = len(lengths)
+    if count <= 1:
+        return np.zeros((count if sources is None else len(sources), count))
+    edge_count = np.count_nonzero(np.isfinite(lengths)) - np.count_nonzero(np.isfinite(lengths.diagonal()))
+    if edge_count < DENSITY_THRESHOLD * count * (count - 1):
+        return get_sparse_distances(lengths, sources)
+    return get_dense_distances(lengths, sources)
+
 
 class Graph:
     missing = math.nan
     is_missing = math.isnan
 
+    @classmethod
+    def is_present(cls, values):
+        if math.isnan(cls.missing):
+            return ~np.isnan(values)
+        return values != cls.missing
+
+    @classmethod
+    def from_arrays(cls, vertices, sources, targets, values):
+        graph = cls(vertices)
+        present = cls.is_present(values)
+        if not np.all(present):
+            sources, targets, values = sources[present], targets[present], values[present]
+        keys = sources * graph.vertex_count + targets
+        if np.any(keys[1:] <= keys[:-1]):
+            keys, indices = np.unique(keys, return_index=True)
+            sources, targets, values = sources[indices], targets[indices], values[indices]
+        graph._set_arrays(sources, targets, values)
+        return graph
+
     def __init__(self, vertices):
-        self._vertices = set(vertices)
-        self._edges = {}
-        self._out_edges = {vertex: {} for vertex in self._vertices}
-        self._in_edges = {vertex: {} for vertex in self._vertices}
+        self._labels = sorted(vertices)
+        self._indices = None
+        self._pending = {}
+        self._set_arrays(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
 
     def __abs__(self):
-        return self.map(abs)
+        return self.map(np.abs, vectorized=True)
 
     def __getitem__(self, key):
-        return self._edges.get(key, self.missing)
+        i, j = key
+        indices = self.get_indices()
+        if i not in indices or j not in indices:
+            return self.missing
+        i, j = indices[i], indices[j]
+        if (i, j) in self._pending:
+            return self._pending[i, j]
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        position = start + np.searchsorted(self._targets[start:stop], j)
+        if position < stop and self._targets[position] == j:
+            return self._values[position].item()
+        return self.missing
 
     def __setitem__(self, key, value):
         i, j = key
-        if self.is_missing(value):
-            self._edges.pop(key, None)
-            self._out_edges[i].pop(j, None)
-            self._in_edges[j].pop(i, None)
+        indices = self.get_indices()
+        self._pending[indices[i], indices[j]] = value
+
+    def _set_arrays(self, sources, targets, values):
+        self._validate(values)
+        self._sources = sources
+        self._targets = targets
+        self._values = values
+        self._offsets = np.searchsorted(sources, np.arange(self.vertex_count + 1))
+        self._in_order = None
+        self._in_offsets = None
+
+    def _validate(self, values):
+        pass
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        count = self.vertex_count
+        keys = np.array(list(pending), dtype=np.int64).reshape(-1, 2)
+        keys = keys[:, 0] * count + keys[:, 1]
+        values = np.array(list(pending.values()))
+        present = self.is_present(values)
+        old_keys = self._sources * count + self._targets
+        kept = ~np.isin(old_keys, keys)
+        keys = np.concatenate((old_keys[kept], keys[present]))
+        values = np.concatenate((self._values[kept], values[present]))
+        order = np.argsort(keys, kind="stable")
+        self._set_arrays(keys[order] // count, keys[order] % count, values[order])
+
+    def _get_in_edges(self):
+        self._flush()
+        if self._in_order is None:
+            self._in_order = np.lexsort((self._sources, self._targets))
+            self._in_offsets = np.searchsorted(self._targets[self._in_order], np.arange(self.vertex_count + 1))
+        return self._in_order, self._in_offsets
+
+    def _with_values(self, values, cls=None):
+        if cls is None:
+            cls = type(self)
+        graph = cls.__new__(cls)
+        graph._labels = self._labels
+        graph._indices = self._indices
+        graph._pending = {}
+        present = cls.is_present(values)
+        if np.all(present):
+            graph._validate(values)
+            graph._sources = self._sources
+            graph._targets = self._targets
+            graph._values = values
+            graph._offsets = self._offsets
+            graph._in_order = self._in_order
+            graph._in_offsets = self._in_offsets
         else:
-            self._edges[key] = value
-            self._out_edges[i][j] = value
-            self._in_edges[j][i] = value
+            graph._set_arrays(self._sources[present], self._targets[present], values[present])
+        return graph
 
     @property
     def vertex_count(self):
-        return len(self._vertices)
+        return len(self._labels)
 
     @property
     def edge_count(self):
-        return len(self._edges)
+        self._flush()
+        return len(self._values)
 
     def vertices(self):
-        return iter(self._vertices)
+        return iter(self._labels)
 
     def edges(self):
-        return iter(self._edges.items())
+        self._flush()
+        labels = self._labels
+        for i, j, value in zip(self._sources.tolist(), self._targets.tolist(), self._values.tolist()):
+            yield (labels[i], labels[j]), value
 
     def values(self):
-        return iter(self._edges.values())
+        self._flush()
+        return iter(self._values.tolist())
 
-    def map(self, function, cls=None):
-        if cls is None:
-            cls = type(self)
-        graph = cls(self._vertices)
-        for key, value in self._edges.items():
-            graph[key] = function(value)
-        return graph
+    def get_indices(self):
+        if self._indices is None:
+            self._indices = {vertex: index for index, vertex in enumerate(self._labels)}
+        return self._indices
+
+    def get_arrays(self):
+        self._flush()
+        return self._sources, self._targets, self._values
+
+    def get_offsets(self):
+        self._flush()
+        return self._offsets
+
+    def to_matrix(self):
+        self._flush()
+        matrix = np.full((self.vertex_count, self.vertex_count), self.missing)
+        matrix[self._sources, self._targets] = self._values
+        return matrix
+
+    def map(self, function, cls=None, vectorized=False):
+        self._flush()
+        if vectorized:
+            values = np.asarray(function(self._values))
+        else:
+            values = np.array([function(value) for value in self._values.tolist()])
+        return self._with_values(values.reshape(len(self._values)), cls)
 
     def get_neighbors(self, vertex):
-        neighbors = set()
-        neighbors.update(self._out_edges[vertex])
-        neighbors.update(self._in_edges[vertex])
+        index = self.get_indices()[vertex]
+        in_order, in_offsets = self._get_in_edges()
+        targets = self._targets[self._offsets[index]:self._offsets[index + 1]]
+        sources = self._sources[in_order[in_offsets[index]:in_offsets[index + 1]]]
+        neighbors = set(self._labels[neighbor] for neighbor in np.union1d(targets, sources).tolist())
         neighbors.discard(vertex)
         return neighbors
 
+    def get_subgraph(self, vertices):
+        self._flush()
+        indices = self.get_indices()
+        included = np.zeros(self.vertex_count, dtype=bool)
+        included[[indices[vertex] for vertex in vertices]] = True
+        positions = np.cumsum(included) - 1
+        edges = included[self._sources] & included[self._targets]
+        graph = type(self)(self._labels[index] for index in np.flatnonzero(included).tolist())
+        graph._set_arrays(positions[self._sources[edges]], positions[self._targets[edges]], self._values[edges])
+        return graph
+
     def get_neighborhood(self, vertex):
-        neighbors = self.get_neighbors(vertex)
-        neighborhood = type(self)(neighbors)
-        for i in neighbors:
-            for j, value in self._out_edges[i].items():
-                if j not in neighbors:
-                    continue
-                neighborhood[i, j] = value
-        return neighborhood
+        return self.get_subgraph(self.get_neighbors(vertex))
 
 
 class WeightGraph(Graph):
@@ -82,7 +260,7 @@ class WeightGraph(Graph):
         return 1 / abs(weight)
 
     def get_lengths(self):
-        return self.map(self.get_length, LengthGraph)
+        return self.map(self.get_length, LengthGraph, vectorized=True)
 
 
 class LengthGraph(Graph):
@@ -93,20 +271,8 @@ class LengthGraph(Graph):
         assert value > 0
         super().__setitem__(key, value)
 
+    def _validate(self, values):
+        assert np.all(values > 0)
+
     def get_distances(self):
-        for i in self._vertices:
-            distances_i = dict.fromkeys(self._vertices, math.inf)
-            distances_i[i] = 0.0
-            js = set(self._vertices)
-            while js:
-                j = min(js, key=distances_i.__getitem__)
-                js.remove(j)
-                distance_ij = distances_i[j]
-                if distance_ij == math.inf:
-                    break
-                for k, length_jk in self._out_edges[j].items():
-                    distance_ijk = distance_ij + length_jk
-                    if distance_ijk < distances_i[k]:
-                        distances_i[k] = distance_ijk
-            for j, distance_ij in distances_i.items():
-                yield (i, j), distance_ij
+        return get_distances(self.to_matrix())
@@ -0,0 +1,50 @@
+import argparse
+
+import polyworld as pw
+from metrics.base import parse_jobs_arg, parse_run_arg
+
+TABLES = (
+    (pw.paths.lifespans, "LifeSpans"),
+    (pw.paths.population, "Population"),
+    (pw.paths.food_consumption, "FoodConsumption"),
+    (pw.paths.food_energy, "FoodEnergy")
+)
+
+
+def ingest_table(path, table_name):
+    table = pw.parse_text(path, table_name)
+    pw.Table.from_rows(table.colnames, table.rows()).write(pw.paths.table(path, table_name))
+
+
+def ingest_events(run):
+    pw.EventIndex.read_text(run).to_table().write(pw.paths.table(pw.paths.events(run), pw.EventIndex.TABLE_NAME))
+
+
+def ingest_brains(run, jobs):
+    for stage in pw.Stage:
+        pw.SynapseStore.build(run, stage, jobs)
+
+
+def ingest(run, jobs=1):
+    for get_path, table_name in TABLES:
+        path = get_path(run)
+        try:
+            pw.resolve(path)
+        except FileNotFoundError:
+            continue
+        ingest_table(path, table_name)
+    ingest_events(run)
+    ingest_brains(run, jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", metavar="N", type=parse_jobs_arg, default=1)
+    parser.add_argument("runs", metavar="RUN", nargs="+", type=parse_run_arg)
+    args = parser.parse_args()
+    for run in args.runs:
+        ingest(run, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,102 @@
 import argparse
+import importlib
 import sys
 import textwrap
 
-from .density import Density
-from .diversity import Diversity
-from .efficiency import Efficiency
-from .event_count import EventCount
-from .food_consumption import FoodConsumption
-from .food_energy import FoodEnergy
-from .gene import Gene
-from .lifespan import Lifespan
-from .modularity import Modularity
-from .neuron_count import NeuronCount
-from .population import Population
-from .selection import Selection
-from .synapse_count import SynapseCount
-from .weight import Weight
-
-
-def parse_args(args=None):
-    metrics = {metric.__name__: metric for metric in (
-        Density,
-        Diversity,
-        Efficiency,
-        EventCount,
-        FoodConsumption,
-        FoodEnergy,
-        Gene,
-        Lifespan,
-        Modularity,
-        NeuronCount,
-        Population,
-        Selection,
-        SynapseCount,
-        Weight
-    )}
+from .base import calculate, parse_jobs_arg, parse_prefetch_arg
+
+METRICS = {
+    "Density": "density",
+    "Diversity": "diversity",
+    "Efficiency": "efficiency",
+    "EventCount": "event_count",
+    "FoodConsumption": "food_consumption",
+    "FoodEnergy": "food_energy",
+    "Gene": "gene",
+    "Lifespan": "lifespan",
+    "Modularity": "modularity",
+    "NeuronCount": "neuron_count",
+    "Population": "population",
+    "Selection": "selection",
+    "SynapseCount": "synapse_count",
+    "Weight": "weight"
+}
+
+
+def get_metric(name):
+    return getattr(importlib.import_module(f".{METRICS[name]}", __name__), name)
+
+
+def __getattr__(name):
+    if name not in METRICS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    return get_metric(name)
+
+
+SPEC_EXCLUDED_OPTIONS = (
+    "cache",
+    "cache_size",
+    "io_statistics",
+    "instrument",
+    "profile",
+    "jobs",
+    "prefetch",
+    "output",
+    "resume"
+)
+
+
+def parse_args(args=None, excluded_options=()):
     if args is None:
         args = sys.argv[1:]
     wrapper = textwrap.TextWrapper(subsequent_indent="  ")
-    epilog = wrapper.fill("metrics: " + ", ".join(sorted(metrics)))
+    epilog = wrapper.fill("metrics: " + ", ".join(sorted(METRICS)))
     parser = argparse.ArgumentParser(epilog=epilog, formatter_class=argparse.RawDescriptionHelpFormatter)
-    metric_name = next(filter(metrics.__contains__, args), None)
+    metric_name = next(filter(METRICS.__contains__, args), None)
     if metric_name is None:
         parser.add_argument("metric", metavar="METRIC")
         parser.add_argument("option", metavar="OPTION", nargs="*")
         parser.print_help(sys.stderr)
         raise SystemExit(1)
-    metric = metrics[metric_name]
+    metric = get_metric(metric_name)
     metric.add_arguments(parser)
-    return metric(**vars(parser.parse_args(args)))
+    metric_args = parser.parse_args(args)
+    for name in excluded_options:
+        if getattr(metric_args, name, None) != parser.get_default(name):
+            parser.error(f"argument --{name.replace('_', '-')}: not allowed in batch or ensemble mode")
+    metric.check_arguments(parser, metric_args)
+    return metric(**vars(metric_args))
+
+
+BATCH_SEPARATOR = "+"
+
+
+def is_batch_args(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    for arg in args:
+        if arg in METRICS:
+            return False
+        if arg == "--batch" or arg.startswith("--batch="):
+            return True
+    return False
+
+
+def parse_batch_args(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    usage = f"%(prog)s --batch DIRECTORY [--jobs N] [--prefetch N] METRIC OPTION... [{BATCH_SEPARATOR} METRIC OPTION...]"
+    parser = argparse.ArgumentParser(usage=usage)
+    parser.add_argument("--batch", metavar="DIRECTORY", required=True)
+    parser.add_argument("--jobs", metavar="N", type=parse_jobs_arg, default=1)
+    parser.add_argument("--prefetch", metavar="N", type=parse_prefetch_arg, default=0)
+    parser.add_argument("specs", metavar="SPEC", nargs=argparse.REMAINDER)
+    batch_args = parser.parse_args(args)
+    specs = [[]]
+    for arg in batch_args.specs:
+        if arg == BATCH_SEPARATOR:
+            specs.append([])
+        else:
+            specs[-1].append(arg)
+    metrics = [parse_args(spec, SPEC_EXCLUDED_OPTIONS) for spec in specs]
+    return batch_args.batch, batch_args.jobs, batch_args.prefetch, metrics
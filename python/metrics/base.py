@@ -1,12 +1,20 @@
 import abc
 import argparse
+import collections
+import concurrent.futures
+import importlib.util
+import io
 import math
+import multiprocessing
+import numbers
+import os
 import re
 
 import numpy as np
-import pandas as pd
 
 import polyworld as pw
+from .cache import Cache, get_signature
+from .loader import Loader
 
 
 class Range:
@@ -26,6 +34,9 @@ class Range:
         self.min = min_
         self.max = max_
 
+    def __str__(self):
+        return f"{'' if self.min is None else self.min}..{'' if self.max is None else self.max}"
+
     def __contains__(self, value):
         return (self.min is None or value >= self.min) and (self.max is None or value <= self.max)
 
@@ -56,6 +67,279 @@ def parse_regex_arg(arg):
         raise argparse.ArgumentTypeError(f"invalid regex: '{arg}'") from ex
 
 
+def parse_prefetch_arg(arg):
+    try:
+        prefetch = int(arg)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"invalid prefetch: '{arg}'") from ex
+    if prefetch < 0:
+        raise argparse.ArgumentTypeError(f"invalid prefetch: '{arg}'")
+    return prefetch
+
+
+def parse_jobs_arg(arg):
+    try:
+        jobs = int(arg)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"invalid jobs: '{arg}'") from ex
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"invalid jobs: '{arg}'")
+    return jobs
+
+
+CHUNKS_PER_JOB = 4
+_worker_metrics = None
+_worker_prefetch = 0
+
+
+def _initialize_worker(metrics, instrumented, prefetch):
+    global _worker_metrics, _worker_prefetch
+    _worker_metrics = metrics
+    _worker_prefetch = prefetch
+    pw.instrumentation.enabled = instrumented
+
+
+def _read(metric, agent):
+    try:
+        if not pw.instrumentation.enabled:
+            metric._read(agent)
+            return None
+        _, record = pw.instrumentation.record(lambda: metric._read(agent))
+    except Exception:
+        return None
+    del record["times"]["compute"]
+    return record
+
+
+def _get_value(metric, agent, future=None):
+    def get():
+        if future is not None:
+            with pw.instrumentation.time("wait"):
+                concurrent.futures.wait((future,))
+        return metric._get_value(agent)
+
+    if not pw.instrumentation.enabled:
+        return get(), None
+    value, record = pw.instrumentation.record(get, metric=type(metric).__name__, agent=agent)
+    if future is not None and future.result() is not None:
+        pw.instrumentation.merge(record, future.result())
+    return value, record
+
+
+def _get_serial_values(metrics, items, prefetch=0):
+    if prefetch == 0:
+        for index, agent in items:
+            yield _get_value(metrics[index], agent)
+        return
+    with concurrent.futures.ThreadPoolExecutor(prefetch) as executor:
+        futures = collections.deque()
+        for index, agent in items[:prefetch]:
+            futures.append(executor.submit(_read, metrics[index], agent))
+        for position, (index, agent) in enumerate(items):
+            if position + prefetch < len(items):
+                next_index, next_agent = items[position + prefetch]
+                futures.append(executor.submit(_read, metrics[next_index], next_agent))
+            yield _get_value(metrics[index], agent, futures.popleft())
+
+
+def _get_worker_values(items):
+    return list(_get_serial_values(_worker_metrics, items, _worker_prefetch))
+
+
+def _add_records(results):
+    for value, record in results:
+        if record is not None:
+            pw.instrumentation.add_record(record)
+        yield value
+
+
+def get_values(metrics, items, jobs=1, prefetch=0):
+    items = list(items)
+    if jobs == 1:
+        yield from _add_records(_get_serial_values(metrics, items, prefetch))
+        return
+    chunk_size = max(1, len(items) // (jobs * CHUNKS_PER_JOB))
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+    initargs = (metrics, pw.instrumentation.enabled, prefetch)
+    with multiprocessing.Pool(jobs, _initialize_worker, initargs) as pool:
+        for results in pool.imap(_get_worker_values, chunks):
+            yield from _add_records(results)
+
+
+def _reduce_nanmean(sums, counts, nan_counts):
+    return np.divide(sums, counts, out=np.full(len(sums), math.nan), where=counts > 0)
+
+
+def _reduce_mean(sums, counts, nan_counts):
+    return np.where(nan_counts > 0, math.nan, _reduce_nanmean(sums, counts, nan_counts))
+
+
+def _reduce_nansum(sums, counts, nan_counts):
+    return sums
+
+
+def _reduce_sum(sums, counts, nan_counts):
+    return np.where(nan_counts > 0, math.nan, sums)
+
+
+REDUCERS = {
+    np.nanmean: _reduce_nanmean,
+    np.mean: _reduce_mean,
+    np.nansum: _reduce_nansum,
+    np.sum: _reduce_sum
+}
+
+
+def sweep(time_count, starts, stops, weights):
+    changes = np.zeros(time_count + 1)
+    np.add.at(changes, starts, weights)
+    np.add.at(changes, stops, -weights)
+    return np.cumsum(changes[:-1])
+
+
+OUTPUT_FORMATS = {
+    "text": ".txt",
+    "npy": ".npy",
+    "npz": ".npz"
+}
+if importlib.util.find_spec("pyarrow") is not None:
+    OUTPUT_FORMATS["parquet"] = ".parquet"
+    OUTPUT_FORMATS["feather"] = ".feather"
+NPY_MAGIC = b"\x93NUMPY"
+NPZ_MAGIC = b"PK\x03\x04"
+PARQUET_MAGIC = b"PAR1"
+FEATHER_MAGIC = b"ARROW1"
+EXECUTION_OPTIONS = (
+    "metric",
+    "cache",
+    "cache_size",
+    "io_statistics",
+    "instrument",
+    "profile",
+    "output_format",
+    "jobs",
+    "prefetch",
+    "output",
+    "resume"
+)
+CHECKPOINT_ARGUMENTS = "# ARGUMENTS = "
+
+
+def format_argument(value):
+    if isinstance(value, re.Pattern):
+        return value.pattern
+    return str(value)
+
+
+class Estimate(float):
+    def __new__(cls, value, error):
+        estimate = super().__new__(cls, value)
+        estimate.error = error
+        return estimate
+
+    def __reduce__(self):
+        return type(self), (float(self), self.error)
+
+
+def get_error(value):
+    if isinstance(value, Estimate):
+        return value.error
+    return math.nan
+
+
+def is_integral(value):
+    return isinstance(value, numbers.Integral) and not isinstance(value, bool)
+
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def get_index_names(index_name):
+    if isinstance(index_name, tuple):
+        return index_name
+    return (index_name,)
+
+
+class Series:
+    name = "value"
+    error_name = "error"
+
+    def __init__(self, observations, index_name=None):
+        self.values = {key: math.nan if value is None else value for key, value in dict(observations).items()}
+        self.index_name = index_name
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def items(self):
+        return self.values.items()
+
+    def is_integral(self):
+        return all(is_integral(value) for value in self.values.values())
+
+    def has_errors(self):
+        return any(isinstance(value, Estimate) for value in self.values.values())
+
+    def format_key(self, key, sep):
+        if isinstance(key, tuple):
+            return sep.join(map(str, key))
+        return str(key)
+
+    @staticmethod
+    def format_value(value, na_rep):
+        if value is None or value != value:
+            return na_rep
+        return repr(float(value))
+
+    def to_pandas(self):
+        import pandas as pd
+
+        series = pd.Series(self.values, name=self.name)
+        series.index.names = get_index_names(self.index_name)
+        return series
+
+    def to_arrays(self):
+        names = get_index_names(self.index_name)
+        keys = list(self.values)
+        if len(names) == 1:
+            levels = [np.array(keys)]
+        else:
+            levels = [np.array([key[level] for key in keys]) for level in range(len(names))]
+        if self.is_integral():
+            values = np.array(list(self.values.values()), dtype=np.int64)
+        else:
+            values = np.array(list(self.values.values()), dtype=np.float64)
+        names = [f"level{level}" if name is None else name for level, name in enumerate(names)]
+        arrays = dict(zip((*names, self.name), (*levels, values)))
+        if self.has_errors():
+            arrays[self.error_name] = np.array([get_error(value) for value in self.values.values()], dtype=np.float64)
+        return arrays
+
+    def to_records(self):
+        arrays = self.to_arrays()
+        return np.rec.fromarrays(list(arrays.values()), names=list(arrays))
+
+    def to_csv(self, file, sep=",", na_rep="", header=True):
+        if header:
+            names = get_index_names(self.index_name)
+            errors = (self.error_name,) if self.has_errors() else ()
+            file.write(sep.join(("" if name is None else name for name in (*names, self.name, *errors))) + "\n")
+        integral = self.is_integral()
+        errors = self.has_errors()
+        for key, value in self.values.items():
+            text = str(int(value)) if integral else self.format_value(value, na_rep)
+            if errors:
+                text = f"{text}{sep}{self.format_value(get_error(value), na_rep)}"
+            file.write(f"{self.format_key(key, sep)}{sep}{text}\n")
+
+
 class Metric(abc.ABC):
     has_run_arg = True
     index_name = None
@@ -66,14 +350,22 @@ class Metric(abc.ABC):
         parser.add_argument("metric", metavar=cls.__name__)
         if cls.has_run_arg:
             parser.add_argument("run", metavar="RUN", type=parse_run_arg)
+        parser.add_argument("--cache", metavar="DIRECTORY")
+        parser.add_argument("--cache-size", metavar="BYTES", type=int)
+        parser.add_argument("--io-statistics", action="store_true")
+        parser.add_argument("--instrument", metavar="FILE", nargs="?", const="-")
+        parser.add_argument("--profile", metavar="FILE")
+        parser.add_argument("--output-format", metavar="FORMAT", choices=tuple(OUTPUT_FORMATS), default="text")
+
+    @classmethod
+    def check_arguments(cls, parser, args):
+        pass
 
     @classmethod
     def to_series(cls, observations, index_name=None):
         if index_name is None:
             index_name = cls.index_name
-        series = pd.Series(dict(observations), name="value")
-        series.index.name = index_name
-        return series
+        return Series(observations, index_name)
 
     @classmethod
     @abc.abstractmethod
@@ -89,40 +381,168 @@ class Metric(abc.ABC):
                 yield time, function(buffer)
                 buffer.clear()
 
+    @classmethod
+    @abc.abstractmethod
+    def _get_intervals(cls, run, series):
+        raise NotImplementedError
+
+    @classmethod
+    def _reduce(cls, run, series, reducer, step):
+        times = pw.get_times(run)
+        starts, stops, values = cls._get_intervals(run, series)
+        present = ~np.isnan(values)
+        totals = (
+            sweep(len(times), starts[present], stops[present], values[present]),
+            sweep(len(times), starts[present], stops[present], 1.0),
+            sweep(len(times), starts[~present], stops[~present], 1.0)
+        )
+        bucket_times = np.arange(0, len(times), step)
+        boundaries = np.concatenate(([0], bucket_times[1:] - step + 1))
+        sums, counts, nan_counts = (np.add.reduceat(total[:bucket_times[-1] + 1], boundaries) for total in totals)
+        return zip(bucket_times.tolist(), reducer(sums, counts, nan_counts).tolist())
+
     @classmethod
     def aggregate(cls, run, series, function=None, step=1):
         if function is None:
             function = cls.aggregator
+        if function in REDUCERS:
+            return cls.to_series(cls._reduce(run, series, REDUCERS[function], step), "time")
         return cls.to_series(cls._aggregate(run, series, function, step), "time")
 
     @classmethod
-    def read(cls, file, **kwargs):
+    def _read_arrays(cls, arrays, names, errors=False):
+        import pandas as pd
+
+        if len(names) == 1:
+            index = pd.Index(arrays[names[0]], name=names[0], copy=False)
+        else:
+            index = pd.MultiIndex.from_arrays([arrays[name] for name in names], names=names)
+        series = pd.Series(arrays[Series.name], index=index, name=Series.name, copy=False)
+        if errors:
+            series.attrs["errors"] = pd.Series(arrays[Series.error_name], index=index, name=Series.error_name, copy=False)
+        return series
+
+    @classmethod
+    def _split_errors(cls, frame):
+        series = frame[Series.name]
+        if Series.error_name in frame.columns:
+            series.attrs["errors"] = frame[Series.error_name]
+        return series
+
+    @classmethod
+    def read_binary(cls, file):
+        import pandas as pd
+
+        with open(file, "rb") as f:
+            magic = f.read(8)
+        if magic.startswith(NPY_MAGIC):
+            records = np.load(file, mmap_mode="r")
+            names = tuple(name for name in records.dtype.names if name not in (Series.name, Series.error_name))
+            return cls._read_arrays(records, names, Series.error_name in records.dtype.names)
+        if magic.startswith(NPZ_MAGIC):
+            with np.load(file) as arrays:
+                names = tuple(arrays["index_names"].tolist())
+                series = cls._read_arrays(arrays, names, Series.error_name in arrays.files)
+                series.attrs["arguments"] = str(arrays["arguments"])
+            return series
+        if magic.startswith(PARQUET_MAGIC):
+            return cls._split_errors(pd.read_parquet(file))
+        if magic.startswith(FEATHER_MAGIC):
+            frame = pd.read_feather(file)
+            return cls._split_errors(frame.set_index([name for name in frame.columns if name not in (Series.name, Series.error_name)]))
+        return None
+
+    @classmethod
+    def read(cls, file, squeeze=True, **kwargs):
+        import pandas as pd
+
+        if isinstance(file, (str, os.PathLike)) and squeeze and not kwargs:
+            series = cls.read_binary(file)
+            if series is not None:
+                return series
         default_kwargs = {
             "sep": " ",
             "index_col": 0,
-            "squeeze": True,
             "comment": "#"
         }
-        return pd.read_csv(file, **{**default_kwargs, **kwargs})
+        data = pd.read_csv(file, **{**default_kwargs, **kwargs})
+        if not squeeze or not isinstance(data, pd.DataFrame):
+            return data
+        if Series.error_name in data.columns:
+            return cls._split_errors(data)
+        return data.squeeze("columns")
 
     def __init__(self, **kwargs):
         self.arguments = kwargs
         if self.has_run_arg:
             self.run = kwargs["run"]
+        self.output_format = kwargs.get("output_format", "text")
+        self.cache = None
+        if kwargs.get("cache") is not None:
+            self.cache = Cache(kwargs["cache"], kwargs.get("cache_size"))
+
+    def _get_inputs(self):
+        return []
 
     @abc.abstractmethod
     def _calculate(self):
         raise NotImplementedError
 
     def calculate(self):
-        return self.to_series(self._calculate())
+        if self.cache is None:
+            return self.to_series(self._calculate())
+        inputs = self._get_inputs()
+        key = self.cache.get_key(self, inputs)
+        signature = get_signature(inputs)
+        entry = self.cache.load(key)
+        if entry is not None and entry["signature"] == signature:
+            return self.to_series(entry["observations"])
+        observations = list(self.to_series(self._calculate()).items())
+        self.cache.store(key, {"signature": signature, "observations": observations})
+        return self.to_series(observations)
 
     def _write_arguments(self, file):
         pass
 
-    def write(self, file, series):
+    def get_key_arguments(self):
+        return tuple(sorted(
+            (name, format_argument(value)) for name, value in self.arguments.items() if name not in EXECUTION_OPTIONS))
+
+    def get_arguments(self):
+        file = io.StringIO()
         self._write_arguments(file)
-        series.to_csv(file, sep=" ", na_rep=str(math.nan), header=True)
+        return file.getvalue()
+
+    def get_extension(self):
+        return OUTPUT_FORMATS[self.output_format]
+
+    def is_binary(self):
+        return self.output_format != "text"
+
+    def open_output(self, path):
+        return open(path, "wb" if self.is_binary() else "w")
+
+    def write(self, file, series):
+        if self.output_format == "text":
+            self._write_arguments(file)
+            series.to_csv(file, sep=" ", na_rep=str(math.nan), header=True)
+            return
+        if not isinstance(series, Series):
+            series = Series(series.items(), tuple(series.index.names) if series.index.nlevels > 1 else series.index.name)
+        if self.output_format == "npy":
+            np.save(file, series.to_records())
+        elif self.output_format == "npz":
+            arrays = series.to_arrays()
+            index_names = get_index_names(series.index_name)
+            np.savez(file, **arrays, index_names=np.array(list(arrays)[:len(index_names)]), arguments=np.array(self.get_arguments()))
+        else:
+            frame = series.to_pandas().to_frame()
+            if series.has_errors():
+                frame[Series.error_name] = [get_error(value) for value in series.values.values()]
+            if self.output_format == "parquet":
+                frame.to_parquet(file)
+            else:
+                frame.reset_index().to_feather(file)
 
 
 class PopulationMetric(Metric, abc.ABC):
@@ -133,28 +553,224 @@ class PopulationMetric(Metric, abc.ABC):
         for time in pw.get_times(run):
             yield time, (series.get(time, math.nan),)
 
+    @classmethod
+    def _get_intervals(cls, run, series):
+        times = np.arange(len(pw.get_times(run)))
+        values = np.array([series.get(time, math.nan) for time in times.tolist()], dtype=np.float64)
+        return times, times + 1, values
+
 
 class IndividualMetric(Metric, abc.ABC):
     index_name = "agent"
+    reads_agents = True
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--jobs", metavar="N", type=parse_jobs_arg, default=1)
+        parser.add_argument("--prefetch", metavar="N", type=parse_prefetch_arg, default=0)
+        parser.add_argument("--output", metavar="FILE")
+        parser.add_argument("--resume", action="store_true")
+
+    @classmethod
+    def check_arguments(cls, parser, args):
+        super().check_arguments(parser, args)
+        if args.resume and args.output is None:
+            parser.error("argument --resume: requires --output")
+        if args.output is not None and args.cache is not None:
+            parser.error("argument --output: not allowed with --cache")
 
     @classmethod
     def _group(cls, run, series):
         values = {}
         for agent in pw.get_initial_agents(run):
             values[agent] = series.get(agent, math.nan)
-        events = pw.get_events(run)
+        events = pw.get_event_index(run)
+        added = events.get_mask(pw.Event.Type.adds_agent).tolist()
+        removed = events.get_mask(pw.Event.Type.removes_agent).tolist()
+        agents = events.agents.tolist()
         for time in pw.get_times(run):
-            for event in events[time]:
-                if event.type.adds_agent():
-                    values[event.agent] = series.get(event.agent, math.nan)
-                if event.type.removes_agent():
-                    del values[event.agent]
+            start, stop = events.get_range(time)
+            for index in range(start, stop):
+                if added[index]:
+                    values[agents[index]] = series.get(agents[index], math.nan)
+                if removed[index]:
+                    del values[agents[index]]
             yield time, values.values()
 
+    @classmethod
+    def _get_intervals(cls, run, series):
+        events = pw.get_event_index(run)
+        agents, starts, stops = events.get_intervals(pw.get_initial_agents(run), pw.get_end_time(run))
+        values = np.array([series.get(agent, math.nan) for agent in agents.tolist()], dtype=np.float64)
+        return starts, stops, values
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.jobs = kwargs.get("jobs", 1)
+        self.prefetch = kwargs.get("prefetch", 0)
+        self.loader = Loader(Loader.size + 2 * self.prefetch)
+
+    def _get_inputs(self):
+        return [pw.paths.lifespans(self.run)]
+
+    def _get_agent_inputs(self, agent):
+        return []
+
+    def _prepare(self):
+        pass
+
+    def _read(self, agent):
+        pass
+
     @abc.abstractmethod
     def _get_value(self, agent):
         raise NotImplementedError
 
     def _calculate(self):
-        for agent in pw.get_agents(self.run):
-            yield agent, self._get_value(agent)
+        self._prepare()
+        agents = pw.get_agents(self.run)
+        return zip(agents, get_values((self,), ((0, agent) for agent in agents), self.jobs, self.prefetch))
+
+    def get_checkpoint_path(self, path):
+        if self.output_format == "text":
+            return path
+        return f"{path}.partial"
+
+    def get_checkpoint_arguments(self):
+        return f"{self.get_arguments()}{CHECKPOINT_ARGUMENTS}{self.get_key_arguments()!r}\n"
+
+    def read_checkpoint(self, path):
+        observations = {}
+        arguments = []
+        if not os.path.exists(path):
+            return observations
+        with open(path) as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                if line.startswith("#"):
+                    arguments.append(line)
+                    continue
+                chunks = line.split()
+                if len(chunks) not in (2, 3) or chunks[0] == self.index_name:
+                    continue
+                value = parse_value(chunks[1])
+                if len(chunks) == 3:
+                    value = Estimate(value, float(chunks[2]))
+                observations[int(chunks[0])] = value
+        arguments = "".join(arguments)
+        expected = self.get_checkpoint_arguments() if CHECKPOINT_ARGUMENTS in arguments else self.get_arguments()
+        if observations and arguments != expected:
+            raise ValueError(f"checkpoint arguments do not match: '{path}'")
+        return observations
+
+    def _format_checkpoint_value(self, value, error, integral, estimated):
+        text = str(int(value)) if integral else Series.format_value(value, str(math.nan))
+        if estimated:
+            text = f"{text} {Series.format_value(error, str(math.nan))}"
+        return text
+
+    def _write_checkpoint(self, path, values, errors, done, integral, estimated):
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as f:
+            f.write(self.get_checkpoint_arguments())
+            f.write(f"{self.index_name} {Series.name}{f' {Series.error_name}' if estimated else ''}\n")
+            for row in np.flatnonzero(done).tolist():
+                f.write(f"{row + 1} {self._format_checkpoint_value(values[row], errors[row], integral, estimated)}\n")
+        os.replace(temporary_path, path)
+
+    def _write_output(self, path, series):
+        temporary_path = f"{path}.tmp"
+        with self.open_output(temporary_path) as f:
+            self.write(f, series)
+        os.replace(temporary_path, path)
+
+    def stream(self, path):
+        if self.cache is not None or not self.reads_agents:
+            series = self.calculate()
+            self._write_output(path, series)
+            return series
+        checkpoint_path = self.get_checkpoint_path(path)
+        agents = pw.get_agents(self.run)
+        values = np.full(len(agents), math.nan)
+        errors = np.full(len(agents), math.nan)
+        done = np.zeros(len(agents), dtype=bool)
+        integral = True
+        estimated = False
+        if self.arguments.get("resume"):
+            for agent, value in self.read_checkpoint(checkpoint_path).items():
+                if agent in agents:
+                    values[agent - 1] = value
+                    errors[agent - 1] = get_error(value)
+                    done[agent - 1] = True
+                    integral = integral and is_integral(value)
+                    estimated = estimated or isinstance(value, Estimate)
+        self._write_checkpoint(checkpoint_path, values, errors, done, integral and done.any(), estimated)
+        self._prepare()
+        missing = [agent for agent in agents if not done[agent - 1]]
+        with open(checkpoint_path, "a") as f:
+            for agent, value in zip(missing, get_values((self,), ((0, agent) for agent in missing), self.jobs, self.prefetch)):
+                integral = integral and is_integral(value)
+                values[agent - 1] = math.nan if value is None else value
+                errors[agent - 1] = get_error(value)
+                done[agent - 1] = True
+                line = self._format_checkpoint_value(values[agent - 1], errors[agent - 1], is_integral(value), isinstance(value, Estimate))
+                f.write(f"{agent} {line}\n")
+                f.flush()
+                estimated = estimated or isinstance(value, Estimate)
+        if integral and len(values) > 0:
+            observations = values.astype(np.int64).tolist()
+        elif estimated:
+            observations = [Estimate(value, error) for value, error in zip(values.tolist(), errors.tolist())]
+        else:
+            observations = values.tolist()
+        series = self.to_series(zip(agents, observations))
+        self._write_output(path, series)
+        if checkpoint_path != path:
+            os.remove(checkpoint_path)
+        return series
+
+    def calculate(self):
+        if self.cache is None or not self.reads_agents:
+            return super().calculate()
+        inputs = self._get_inputs()
+        key = self.cache.get_key(self, inputs)
+        signature = get_signature(inputs)
+        entry = self.cache.load(key)
+        if entry is None or entry["signature"] != signature:
+            entry = {"signature": signature, "agents": {}}
+        self._prepare()
+        agents = pw.get_agents(self.run)
+        signatures = {agent: get_signature(self._get_agent_inputs(agent)) for agent in agents}
+        cached = entry["agents"]
+        missing = [agent for agent in agents if agent not in cached or cached[agent][0] != signatures[agent]]
+        values = dict(zip(missing, get_values((self,), ((0, agent) for agent in missing), self.jobs, self.prefetch)))
+        entry["agents"] = {agent: (signatures[agent], values[agent] if agent in values else cached[agent][1]) for agent in agents}
+        if missing or len(cached) != len(agents):
+            self.cache.store(key, entry)
+        return self.to_series((agent, value) for agent, (_, value) in entry["agents"].items())
+
+
+def calculate(metrics, jobs=1, prefetch=0):
+    serieses = [None] * len(metrics)
+    runs = collections.defaultdict(list)
+    for index, metric in enumerate(metrics):
+        if isinstance(metric, IndividualMetric) and metric.reads_agents:
+            runs[metric.run].append(index)
+        else:
+            serieses[index] = metric.calculate()
+    loader = Loader(Loader.size + 2 * prefetch)
+    items = []
+    for run, indices in runs.items():
+        for index in indices:
+            metrics[index].loader = loader
+            metrics[index]._prepare()
+        items.extend((index, agent) for agent in pw.get_agents(run) for index in indices)
+    observations = collections.defaultdict(list)
+    for (index, agent), value in zip(items, get_values(metrics, items, jobs, prefetch)):
+        observations[index].append((agent, value))
+    for indices in runs.values():
+        for index in indices:
+            serieses[index] = metrics[index].to_series(observations[index])
+    return serieses
@@ -0,0 +1,78 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+
+import polyworld as pw
+
+
+def get_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            path = pw.resolve(path)
+        except FileNotFoundError:
+            signature.append((path, None, None))
+            continue
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class Cache:
+    size = 2 ** 30
+
+    def __init__(self, directory, size=None):
+        self.directory = directory
+        if size is not None:
+            self.size = size
+
+    def get_key(self, metric, paths):
+        hash_ = hashlib.sha256()
+        hash_.update(type(metric).__name__.encode())
+        if metric.has_run_arg:
+            hash_.update(os.path.abspath(metric.run).encode())
+        hash_.update(repr(metric.get_key_arguments()).encode())
+        for path in paths:
+            hash_.update(os.path.abspath(path).encode())
+        return hash_.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def load(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return entry
+
+    def store(self, key, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=self.directory, delete=False) as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, self._get_path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pickle"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, name in entries[:-1]:
+            if size <= self.size:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(self.directory, name))
+            size -= entry_size
@@ -3,6 +3,13 @@ from .base import IndividualMetric
 
 
 class Density(IndividualMetric):
+    def _get_agent_inputs(self, agent):
+        return [pw.paths.synapses(self.run, agent, pw.Stage.BIRTH)]
+
+    def _read(self, agent):
+        self.loader.read_synapse_count(self.run, agent)
+        self.loader.read_dimensions(self.run, agent)
+
     def _get_value(self, agent):
-        brain = pw.Brain.read(self.run, agent)
-        return brain.synapse_count / brain.synapse_count_max
+        synapse_count = self.loader.read_synapse_count(self.run, agent)
+        return synapse_count / self.loader.read_dimensions(self.run, agent).synapse_count_max
@@ -1,5 +1,9 @@
+import pandas as pd
+
 from .base import PopulationMetric, parse_range_arg
 
+CHUNK_SIZE = 10000
+
 
 class Diversity(PopulationMetric):
     has_run_arg = False
@@ -7,6 +11,7 @@ class Diversity(PopulationMetric):
     @classmethod
     def add_arguments(cls, parser):
         super().add_arguments(parser)
+        parser.add_argument("--chunk-size", metavar="ROWS", type=int, default=CHUNK_SIZE)
         parser.add_argument("data", metavar="DATA")
         parser.add_argument("genes", metavar="GENES", type=parse_range_arg)
 
@@ -14,15 +19,26 @@ class Diversity(PopulationMetric):
         super().__init__(**kwargs)
         self.data = kwargs["data"]
         self.genes = kwargs["genes"]
+        self.chunk_size = kwargs.get("chunk_size", CHUNK_SIZE)
 
-    def get_data(self):
+    def _get_inputs(self):
+        return [self.data]
+
+    def get_columns(self):
         if self.genes.is_finite():
-            columns = ["time", *(f"value{index}" for index in self.genes)]
-            return self.read(self.data, usecols=columns, squeeze=False)
-        else:
-            data = self.read(self.data, squeeze=False)
-            columns = [f"value{index}" for index in range(len(data.columns)) if index in self.genes]
-            return data[columns]
+            return [f"value{index}" for index in self.genes]
+        header = self.read(self.data, nrows=0, squeeze=False)
+        return [f"value{index}" for index in range(len(header.columns)) if index in self.genes]
+
+    def get_chunks(self):
+        columns = ["time", *self.get_columns()]
+        return self.read(self.data, usecols=columns, squeeze=False, chunksize=self.chunk_size)
+
+    def get_data(self):
+        return pd.concat(self.get_chunks())
 
     def _calculate(self):
-        return self.get_data().mean(axis=1)
+        return pd.concat(chunk.mean(axis=1) for chunk in self.get_chunks())
+
+    def _write_arguments(self, file):
+        file.write(f"# GENES = {self.genes}\n")
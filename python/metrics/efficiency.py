@@ -1,27 +1,88 @@
+import argparse
 import enum
-import statistics
+import math
+
+import numpy as np
 
 import polyworld as pw
-from .base import IndividualMetric
+from graph import get_distances, get_length_matrix
+from .base import Estimate, IndividualMetric
+
+Z = 1.959963984540054
+
+
+def parse_samples_arg(arg):
+    try:
+        samples = int(arg)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"invalid samples: '{arg}'") from ex
+    if samples < 2:
+        raise argparse.ArgumentTypeError(f"invalid samples: '{arg}'")
+    return samples
+
+
+def parse_tolerance_arg(arg):
+    try:
+        tolerance = float(arg)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(f"invalid tolerance: '{arg}'") from ex
+    if not tolerance > 0.0:
+        raise argparse.ArgumentTypeError(f"invalid tolerance: '{arg}'")
+    return tolerance
 
 
 def get_efficiency(lengths):
-    if lengths.vertex_count <= 1:
+    count = len(lengths)
+    if count <= 1:
         return 0.0
-    return statistics.mean(1 / distance for (i, j), distance in lengths.get_distances() if j != i)
+    distances = get_distances(lengths)
+    return float(np.mean(1 / distances[~np.eye(count, dtype=bool)]))
 
 
 def get_global_efficiency(lengths):
     return get_efficiency(lengths)
 
 
+def get_source_efficiencies(lengths, sources):
+    distances = get_distances(lengths, sources)
+    distances[np.arange(len(sources)), sources] = math.inf
+    return np.sum(1 / distances, axis=1) / (len(lengths) - 1)
+
+
+def get_standard_error(efficiencies, count):
+    sample_count = len(efficiencies)
+    if sample_count >= count:
+        return 0.0
+    correction = (count - sample_count) / (count - 1)
+    return float(np.std(efficiencies, ddof=1) / math.sqrt(sample_count) * math.sqrt(correction))
+
+
+def get_sampled_global_efficiency(lengths, samples, tolerance, rng):
+    count = len(lengths)
+    if count <= 1:
+        return Estimate(0.0, 0.0)
+    sources = rng.permutation(count)
+    efficiencies = get_source_efficiencies(lengths, sources[:samples])
+    while len(efficiencies) < count:
+        if tolerance is None or Z * get_standard_error(efficiencies, count) <= tolerance:
+            break
+        batch = sources[len(efficiencies):len(efficiencies) + samples]
+        efficiencies = np.concatenate((efficiencies, get_source_efficiencies(lengths, batch)))
+    return Estimate(float(np.mean(efficiencies)), get_standard_error(efficiencies, count))
+
+
 def get_local_efficiency(lengths):
-    if lengths.vertex_count == 0:
+    if len(lengths) == 0:
         return 0.0
-    return statistics.mean(get_efficiency(lengths.get_neighborhood(vertex)) for vertex in lengths.vertices())
+    neighborhoods = np.isfinite(lengths)
+    neighborhoods |= neighborhoods.T
+    np.fill_diagonal(neighborhoods, False)
+    return float(np.mean([get_efficiency(lengths[np.ix_(neighbors, neighbors)]) for neighbors in neighborhoods]))
 
 
 class Efficiency(IndividualMetric):
+    default_samples = 10
+
     class Scope(enum.Enum):
         LOCAL = "local"
         GLOBAL = "global"
@@ -31,24 +92,61 @@ class Efficiency(IndividualMetric):
         super().add_arguments(parser)
         parser.add_argument("scope", metavar="SCOPE", choices=tuple(scope.value for scope in cls.Scope))
         parser.add_argument("stage", metavar="STAGE", choices=tuple(stage.value for stage in pw.Stage))
+        parser.add_argument("--samples", metavar="K", type=parse_samples_arg)
+        parser.add_argument("--tolerance", metavar="WIDTH", type=parse_tolerance_arg)
+        parser.add_argument("--seed", metavar="SEED", type=int, default=0)
+
+    @classmethod
+    def check_arguments(cls, parser, args):
+        super().check_arguments(parser, args)
+        if cls.Scope(args.scope) == cls.Scope.LOCAL:
+            for name in ("samples", "tolerance"):
+                if getattr(args, name) is not None:
+                    parser.error(f"argument --{name}: not allowed with {cls.Scope.LOCAL.value} scope")
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.scope = self.Scope(kwargs["scope"])
         self.stage = pw.Stage(kwargs["stage"])
+        self.samples = kwargs.get("samples")
+        self.tolerance = kwargs.get("tolerance")
+        self.seed = kwargs.get("seed", 0)
+        if self.samples is None and self.tolerance is not None:
+            self.samples = self.default_samples
+
+    @property
+    def sampled(self):
+        return self.scope == self.Scope.GLOBAL and self.samples is not None
+
+    def _get_agent_inputs(self, agent):
+        return [pw.paths.synapses(self.run, agent, self.stage)]
+
+    def _read(self, agent):
+        self.loader.read_brain(self.run, agent, self.stage)
 
     def _get_value(self, agent):
         try:
-            brain = pw.Brain.read(self.run, agent, self.stage)
+            brain = self.loader.read_brain(self.run, agent, self.stage)
         except FileNotFoundError:
             return None
-        lengths = brain.weights.get_lengths()
+        with pw.instrumentation.time("build"):
+            lengths = get_length_matrix(brain.get_weight_matrix())
+        pw.instrumentation.count("vertices", brain.neuron_count)
+        pw.instrumentation.count("edges", brain.synapse_count)
         if self.scope == self.Scope.LOCAL:
             return get_local_efficiency(lengths)
         if self.scope == self.Scope.GLOBAL:
+            if self.sampled:
+                rng = np.random.default_rng((self.seed, agent))
+                return get_sampled_global_efficiency(lengths, self.samples, self.tolerance, rng)
             return get_global_efficiency(lengths)
         raise ValueError
 
     def _write_arguments(self, file):
         file.write(f"# SCOPE = {self.scope.value}\n")
         file.write(f"# STAGE = {self.stage.value}\n")
+        if self.sampled:
+            file.write(f"# SAMPLES = {self.samples}\n")
+            if self.tolerance is not None:
+                file.write(f"# TOLERANCE = {self.tolerance}\n")
+            file.write(f"# SEED = {self.seed}\n")
@@ -12,10 +12,13 @@ class EventCount(PopulationMetric):
         super().__init__(**kwargs)
         self.type = pw.Event.Type(kwargs["type"])
 
+    def _get_inputs(self):
+        return [pw.paths.events(self.run), pw.paths.end_time(self.run)]
+
     def _calculate(self):
-        events = pw.get_events(self.run)
-        for time in pw.get_times(self.run):
-            yield time, sum(1 for event in events[time] if event.type == self.type)
+        times = pw.get_times(self.run)
+        counts = pw.get_event_index(self.run).count(self.type, len(times))
+        return zip(times, counts.tolist())
 
     def _write_arguments(self, file):
         file.write(f"# TYPE = {self.type.value}\n")
@@ -14,6 +14,9 @@ class FoodConsumption(PopulationMetric):
         super().__init__(**kwargs)
         self.type = kwargs["type"]
 
+    def _get_inputs(self):
+        return [pw.paths.food_consumption(self.run), pw.paths.end_time(self.run)]
+
     def _calculate(self):
         values = collections.defaultdict(float)
         table = pw.parse(pw.paths.food_consumption(self.run), "FoodConsumption")
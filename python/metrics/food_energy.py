@@ -12,6 +12,9 @@ class FoodEnergy(PopulationMetric):
         super().__init__(**kwargs)
         self.type = kwargs["type"]
 
+    def _get_inputs(self):
+        return [pw.paths.food_energy(self.run)]
+
     def _calculate(self):
         table = pw.parse(pw.paths.food_energy(self.run), "FoodEnergy")
         for row in table.rows():
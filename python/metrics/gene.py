@@ -1,5 +1,3 @@
-import statistics
-
 import polyworld as pw
 from .base import IndividualMetric, parse_regex_arg
 
@@ -15,14 +13,24 @@ class Gene(IndividualMetric):
         self.regex = kwargs["regex"]
         self.indices = None
 
+    def _get_inputs(self):
+        return [*super()._get_inputs(), pw.paths.gene_indices(self.run)]
+
+    def _get_agent_inputs(self, agent):
+        return [pw.paths.genome(self.run, agent)]
+
+    def _prepare(self):
+        self.indices = pw.get_gene_indices(self.run, self.regex)
+        self.loader.read_genomes(self.run)
+
     def _get_value(self, agent):
-        with pw.open(pw.paths.genome(self.run, agent)) as f:
-            return statistics.mean(int(line) for index, line in enumerate(f) if index in self.indices)
+        genomes = self.loader.read_genomes(self.run)
+        return float(genomes[agent - 1, self.indices].mean())
 
     def _calculate(self):
-        self.indices = set()
-        with pw.open(pw.paths.gene_indices(self.run)) as f:
-            for index, line in enumerate(f):
-                if self.regex.search(line):
-                    self.indices.add(index)
-        return super()._calculate()
+        self._prepare()
+        genomes = self.loader.read_genomes(self.run)
+        return zip(pw.get_agents(self.run), genomes[:, self.indices].mean(axis=1).tolist())
+
+    def _write_arguments(self, file):
+        file.write(f"# REGEX = {self.regex.pattern}\n")
@@ -3,6 +3,11 @@ from .base import IndividualMetric
 
 
 class Lifespan(IndividualMetric):
+    reads_agents = False
+
+    def _get_inputs(self):
+        return [pw.paths.lifespans(self.run)]
+
     def _get_value(self, agent):
         raise NotImplementedError
 
@@ -0,0 +1,68 @@
+import collections
+import concurrent.futures
+import threading
+
+import polyworld as pw
+
+
+class Loader:
+    size = 8
+
+    def __init__(self, size=None):
+        if size is not None:
+            self.size = size
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"size": self.size}
+
+    def __setstate__(self, state):
+        self.__init__(state["size"])
+
+    def _contains(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, function, *args):
+        key = (function, *args)
+        with self._lock:
+            future = self._items.get(key)
+            loading = future is None
+            if loading:
+                future = concurrent.futures.Future()
+                self._items[key] = future
+                if len(self._items) > self.size:
+                    self._items.popitem(last=False)
+            else:
+                self._items.move_to_end(key)
+        if loading:
+            try:
+                future.set_result(function(*args))
+            except BaseException as ex:
+                with self._lock:
+                    if self._items.get(key) is future:
+                        del self._items[key]
+                future.set_exception(ex)
+        return future.result()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def read_brain(self, run, agent, stage=pw.Stage.BIRTH):
+        return self.get(pw.Brain.read, run, agent, stage)
+
+    def read_dimensions(self, run, agent, stage=pw.Stage.BIRTH):
+        if self._contains((pw.Brain.read, run, agent, stage)):
+            return self.read_brain(run, agent, stage).dimensions
+        return self.get(pw.Brain.Dimensions.read, run, agent, stage)
+
+    def read_synapse_count(self, run, agent, stage=pw.Stage.BIRTH):
+        index = pw.get_brain_index(run, stage)
+        if index is not None:
+            return index.get_synapse_count(agent)
+        return self.read_brain(run, agent, stage).synapse_count
+
+    def read_genomes(self, run):
+        return self.get(pw.read_genomes, run)
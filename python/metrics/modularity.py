@@ -1,86 +1,100 @@
-import collections
-import itertools
 import random
 
+import numpy as np
+
 import polyworld as pw
-from graph import WeightGraph
 from .base import IndividualMetric
 
 
 class Partition:
-    def __init__(self, weights):
+    def __init__(self, vertex_count, sources, targets, weights):
+        self.labels = None
+        self.sources = None
+        self.targets = None
         self.weights = None
+        self.strength = None
+        self.out_strengths = None
+        self.in_strengths = None
+        self.offsets = None
         self.neighbors = None
-        self.communities_by_vertex = None
-        self.vertices_by_community = None
-        self.edge_modularities = None
-        self.initialize(weights)
-        self.modularity = sum(self.edge_modularities[edge] for edge in self.get_community_edges())
-
-    def initialize(self, weights):
+        self.neighbor_weights = None
+        self.communities = None
+        self.out_totals = None
+        self.in_totals = None
+        self.initialize(list(range(vertex_count)), sources, targets, weights)
+        self.modularity = self.get_modularity()
+
+    @property
+    def vertex_count(self):
+        return len(self.labels)
+
+    def initialize(self, labels, sources, targets, weights):
+        self.labels = labels
+        self.sources = sources
+        self.targets = targets
         self.weights = weights
-        self.neighbors = {vertex: [] for vertex in weights.vertices()}
-        self.communities_by_vertex = {vertex: vertex for vertex in weights.vertices()}
-        self.vertices_by_community = {vertex: {vertex} for vertex in weights.vertices()}
-        self.edge_modularities = dict.fromkeys(itertools.product(weights.vertices(), repeat=2), 0.0)
-        strength = 0.0
-        out_strengths = collections.defaultdict(float)
-        in_strengths = collections.defaultdict(float)
-        for (i, j), weight_ij in weights.edges():
-            if j != i:
-                self.neighbors[i].append(j)
-                self.neighbors[j].append(i)
-            strength += weight_ij
-            out_strengths[i] += weight_ij
-            in_strengths[j] += weight_ij
-        for i, out_strength_i in out_strengths.items():
-            for j, in_strength_j in in_strengths.items():
-                actual_weight = weights[i, j]
-                expected_weight = out_strength_i * in_strength_j / strength
-                self.edge_modularities[i, j] = (actual_weight - expected_weight) / strength
-
-    def get_community_edges(self):
-        for community, vertices in self.vertices_by_community.items():
-            for edge in itertools.product(vertices, repeat=2):
-                yield edge
-
-    def get_community_neighbors(self, vertex, community):
-        neighbors = self.vertices_by_community[community].copy()
-        neighbors.discard(vertex)
-        return neighbors
-
-    def get_modularity_change(self, vertex, community):
-        i = vertex
-        js = self.get_community_neighbors(vertex, community)
-        return sum(self.edge_modularities[i, j] + self.edge_modularities[j, i] for j in js)
+        self.strength = float(weights.sum())
+        self.out_strengths = np.bincount(sources, weights, self.vertex_count)
+        self.in_strengths = np.bincount(targets, weights, self.vertex_count)
+        external = sources != targets
+        rows = np.concatenate((sources[external], targets[external]))
+        columns = np.concatenate((targets[external], sources[external]))
+        order = np.lexsort((columns, rows))
+        self.offsets = np.searchsorted(rows[order], np.arange(self.vertex_count + 1))
+        self.neighbors = columns[order]
+        self.neighbor_weights = np.concatenate((weights[external], weights[external]))[order]
+        self.communities = np.arange(self.vertex_count)
+        self.out_totals = self.out_strengths.copy()
+        self.in_totals = self.in_strengths.copy()
+
+    def get_modularity(self):
+        if self.strength == 0.0:
+            return 0.0
+        internal = self.communities[self.sources] == self.communities[self.targets]
+        expected_weight = np.dot(self.out_totals, self.in_totals) / self.strength
+        return float((self.weights[internal].sum() - expected_weight) / self.strength)
+
+    def get_modularity_changes(self, vertex, weights, out_totals, in_totals):
+        expected_weights = (self.out_strengths[vertex] * in_totals + self.in_strengths[vertex] * out_totals) / self.strength
+        return (weights - expected_weights) / self.strength
 
     def optimize_once(self):
         changed = False
-        vertices = list(self.weights.vertices())
+        vertices = list(range(self.vertex_count))
         random.shuffle(vertices)
         for vertex in vertices:
-            community_old = self.communities_by_vertex[vertex]
-            communities_new = set(self.communities_by_vertex[neighbor] for neighbor in self.neighbors[vertex])
-            communities_new.discard(community_old)
-            if not communities_new:
+            start, stop = self.offsets[vertex], self.offsets[vertex + 1]
+            if start == stop:
                 continue
-            changes = {}
-            removal_change = self.get_modularity_change(vertex, community_old)
-            for community_new in communities_new:
-                addition_change = self.get_modularity_change(vertex, community_new)
-                changes[community_new] = addition_change - removal_change
-            change_max = max(changes.values())
+            community_old = self.communities[vertex]
+            communities, inverse = np.unique(self.communities[self.neighbors[start:stop]], return_inverse=True)
+            weights = np.bincount(inverse.ravel(), self.neighbor_weights[start:stop], len(communities))
+            is_old = communities == community_old
+            communities_new = communities[~is_old]
+            if len(communities_new) == 0:
+                continue
+            removal_change = self.get_modularity_changes(
+                vertex,
+                weights[is_old].sum(),
+                self.out_totals[community_old] - self.out_strengths[vertex],
+                self.in_totals[community_old] - self.in_strengths[vertex])
+            addition_changes = self.get_modularity_changes(
+                vertex,
+                weights[~is_old],
+                self.out_totals[communities_new],
+                self.in_totals[communities_new])
+            changes = addition_changes - removal_change
+            change_max = changes.max()
             if change_max <= 0:
                 continue
-            communities_max = tuple(community for community, change in changes.items() if change == change_max)
+            communities_max = tuple(communities_new[changes == change_max].tolist())
             community_max = random.choice(communities_max)
-            self.communities_by_vertex[vertex] = community_max
-            community_old_vertices = self.vertices_by_community[community_old]
-            community_old_vertices.remove(vertex)
-            if not community_old_vertices:
-                del self.vertices_by_community[community_old]
-            self.vertices_by_community[community_max].add(vertex)
-            self.modularity += change_max
+            self.communities[vertex] = community_max
+            self.out_totals[community_old] -= self.out_strengths[vertex]
+            self.in_totals[community_old] -= self.in_strengths[vertex]
+            self.out_totals[community_max] += self.out_strengths[vertex]
+            self.in_totals[community_max] += self.in_strengths[vertex]
+            self.modularity += float(change_max)
             changed = True
         return changed
 
@@ -91,19 +105,23 @@ class Partition:
         return changed
 
     def combine(self):
-        weights = WeightGraph(set(self.vertices_by_community))
-        for (i, j), weight in self.weights.edges():
-            weights[self.communities_by_vertex[i], self.communities_by_vertex[j]] += weight
-        self.initialize(weights)
+        communities = np.unique(self.communities)
+        labels = [self.labels[community] for community in communities.tolist()]
+        vertices = np.zeros(self.vertex_count, dtype=np.int64)
+        vertices[communities] = np.arange(len(communities))
+        vertex_count = len(labels)
+        keys = vertices[self.communities[self.sources]] * vertex_count + vertices[self.communities[self.targets]]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse.ravel(), self.weights, len(keys))
+        self.initialize(labels, keys // vertex_count, keys % vertex_count, weights)
 
 
 THRESHOLD = 1e-6
 
 
-def get_partition(weights, threshold=THRESHOLD):
-    if weights.vertex_count <= 1:
-        return 0.0
-    partition = Partition(abs(weights))
+def get_partition(vertex_count, sources, targets, weights, threshold=THRESHOLD):
+    with pw.instrumentation.time("build"):
+        partition = Partition(vertex_count, sources, targets, np.abs(weights))
     modularity = partition.modularity
     while partition.optimize():
         if partition.modularity - modularity < threshold:
@@ -113,8 +131,10 @@ def get_partition(weights, threshold=THRESHOLD):
     return partition
 
 
-def get_modularity(weights, threshold=THRESHOLD):
-    return get_partition(weights, threshold).modularity
+def get_modularity(vertex_count, sources, targets, weights, threshold=THRESHOLD):
+    if vertex_count <= 1:
+        return 0.0
+    return get_partition(vertex_count, sources, targets, weights, threshold).modularity
 
 
 class Modularity(IndividualMetric):
@@ -127,12 +147,21 @@ class Modularity(IndividualMetric):
         super().__init__(**kwargs)
         self.stage = pw.Stage(kwargs["stage"])
 
+    def _get_agent_inputs(self, agent):
+        return [pw.paths.synapses(self.run, agent, self.stage)]
+
+    def _read(self, agent):
+        self.loader.read_brain(self.run, agent, self.stage)
+
     def _get_value(self, agent):
         try:
-            brain = pw.Brain.read(self.run, agent, self.stage)
+            brain = self.loader.read_brain(self.run, agent, self.stage)
         except FileNotFoundError:
             return None
-        return get_modularity(brain.weights)
+        synapses = brain.synapses
+        pw.instrumentation.count("vertices", brain.neuron_count)
+        pw.instrumentation.count("edges", len(synapses))
+        return get_modularity(brain.neuron_count, synapses.pre_neurons, synapses.post_neurons, synapses.weights)
 
     def _write_arguments(self, file):
         file.write(f"# STAGE = {self.stage.value}\n")
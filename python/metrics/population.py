@@ -3,6 +3,9 @@ from .base import PopulationMetric
 
 
 class Population(PopulationMetric):
+    def _get_inputs(self):
+        return [pw.paths.population(self.run), pw.paths.lifespans(self.run)]
+
     def _calculate(self):
         table = pw.parse(pw.paths.population(self.run), "Population")
         yield 0, pw.get_initial_agent_count(self.run)
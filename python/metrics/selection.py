@@ -1,5 +1,9 @@
-from . import Diversity
+import itertools
+
+import pandas as pd
+
 from .base import PopulationMetric, parse_range_arg
+from .diversity import CHUNK_SIZE, Diversity
 
 
 class Selection(PopulationMetric):
@@ -8,14 +12,28 @@ class Selection(PopulationMetric):
     @classmethod
     def add_arguments(cls, parser):
         super().add_arguments(parser)
+        parser.add_argument("--chunk-size", metavar="ROWS", type=int, default=CHUNK_SIZE)
         parser.add_argument("actual", metavar="ACTUAL")
         parser.add_argument("neutral", metavar="NEUTRAL")
         parser.add_argument("genes", metavar="GENES", type=parse_range_arg)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.actual = Diversity(data=kwargs["actual"], genes=kwargs["genes"])
-        self.neutral = Diversity(data=kwargs["neutral"], genes=kwargs["genes"])
+        chunk_size = kwargs.get("chunk_size", CHUNK_SIZE)
+        self.actual = Diversity(data=kwargs["actual"], genes=kwargs["genes"], chunk_size=chunk_size)
+        self.neutral = Diversity(data=kwargs["neutral"], genes=kwargs["genes"], chunk_size=chunk_size)
+
+    def _get_inputs(self):
+        return [self.actual.data, self.neutral.data]
+
+    def _get_chunks(self):
+        for actual, neutral in itertools.zip_longest(self.actual.get_chunks(), self.neutral.get_chunks()):
+            if actual is None or neutral is None or not actual.index.equals(neutral.index):
+                raise ValueError
+            yield (actual / neutral - 1).median(axis=1)
 
     def _calculate(self):
-        return (self.actual.get_data() / self.neutral.get_data() - 1).median(axis=1)
+        return pd.concat(self._get_chunks())
+
+    def _write_arguments(self, file):
+        file.write(f"# GENES = {self.actual.genes}\n")
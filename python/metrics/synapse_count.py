@@ -3,5 +3,11 @@ from .base import IndividualMetric
 
 
 class SynapseCount(IndividualMetric):
+    def _get_agent_inputs(self, agent):
+        return [pw.paths.synapses(self.run, agent, pw.Stage.BIRTH)]
+
+    def _read(self, agent):
+        self.loader.read_synapse_count(self.run, agent)
+
     def _get_value(self, agent):
-        return pw.Brain.read(self.run, agent).synapse_count
+        return self.loader.read_synapse_count(self.run, agent)
@@ -1,4 +1,4 @@
-import statistics
+import numpy as np
 
 import polyworld as pw
 from .base import IndividualMetric
@@ -16,17 +16,23 @@ class Weight(IndividualMetric):
         self.absolute = kwargs["absolute"]
         self.stage = pw.Stage(kwargs["stage"])
 
+    def _get_agent_inputs(self, agent):
+        return [pw.paths.synapses(self.run, agent, self.stage)]
+
+    def _read(self, agent):
+        self.loader.read_brain(self.run, agent, self.stage)
+
     def _get_value(self, agent):
         try:
-            brain = pw.Brain.read(self.run, agent, self.stage)
+            brain = self.loader.read_brain(self.run, agent, self.stage)
         except FileNotFoundError:
             return None
         if brain.synapse_count == 0:
             return 0.0
-        weights = brain.weights
+        weights = brain.synapses.weights
         if self.absolute:
-            weights = abs(weights)
-        return statistics.mean(weights.values())
+            weights = np.abs(weights)
+        return float(np.mean(weights))
 
     def _write_arguments(self, file):
         file.write(f"# ABSOLUTE = {self.absolute}\n")
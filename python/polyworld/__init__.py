@@ -1,6 +1,9 @@
 from . import paths
-from .brain import Brain
-from .event import Event, get_events
+from .brain import Brain, BrainIndex, SynapseStore, get_brain_index, get_synapse_store
+from .event import Event, EventIndex, get_event_index, get_events
+from .genome import get_gene_indices, read_genome, read_genomes
+from .instrumentation import Instrumentation, instrumentation
 from .stage import Stage
-from .synapse import Synapse
+from .synapse import Synapse, Synapses
+from .table import Table, TableWriter
 from .utility import *
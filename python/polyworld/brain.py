@@ -1,11 +1,18 @@
 import enum
+import functools
+import multiprocessing
+import os
 import re
 
+import numpy as np
+
 from graph import WeightGraph
 from . import paths
 from . import utility
+from .instrumentation import instrumentation
 from .stage import Stage
-from .synapse import Synapse
+from .synapse import Synapses
+from .table import Table, TableWriter
 
 
 class Brain:
@@ -33,18 +40,27 @@ class Brain:
             input_neuron_count = int(match.group("input_neuron_count"))
             output_neuron_count = int(match.group("output_neuron_count"))
             weight_max = float(match.group("weight_max"))
-            return cls(neuron_count, input_neuron_count, output_neuron_count, weight_max)
+            synapse_count = int(match.group("synapse_count"))
+            return cls(neuron_count, input_neuron_count, output_neuron_count, weight_max, synapse_count)
 
         @classmethod
         def read(cls, run, agent, stage=Stage.BIRTH):
+            index = get_brain_index(run, stage)
+            if index is not None:
+                return index.get_dimensions(agent)
             with utility.open(paths.synapses(run, agent, stage)) as f:
                 return cls.parse(f.readline(), agent)
 
-        def __init__(self, neuron_count, input_neuron_count, output_neuron_count, weight_max):
+        def __init__(self, neuron_count, input_neuron_count, output_neuron_count, weight_max, synapse_count=None):
             self.neuron_count = neuron_count
             self.input_neuron_count = input_neuron_count
             self.output_neuron_count = output_neuron_count
             self.weight_max = weight_max
+            self.synapse_count = synapse_count
+
+        @property
+        def synapse_count_max(self):
+            return self.neuron_count * (self.neuron_count - self.input_neuron_count - 1)
 
         def get_neurons(self, layer):
             if layer == Brain.Layer.ALL:
@@ -61,20 +77,38 @@ class Brain:
 
     @classmethod
     def read(cls, run, agent, stage=Stage.BIRTH):
-        with utility.open(paths.synapses(run, agent, stage)) as f:
-            dimensions = cls.Dimensions.parse(f.readline(), agent)
-            input_neurons = dimensions.get_neurons(Brain.Layer.INPUT)
-            brain = cls(dimensions)
-            for line in f:
-                synapse = Synapse.parse(line)
-                assert synapse.post_neuron != synapse.pre_neuron
-                assert synapse.post_neuron not in input_neurons
-                brain.weights[synapse.pre_neuron, synapse.post_neuron] += synapse.weight / dimensions.weight_max
-            return brain
-
-    def __init__(self, dimensions):
+        store = get_synapse_store(run, stage)
+        if store is not None:
+            return store.read_brain(agent)
+        return cls.read_text(run, agent, stage)
+
+    @classmethod
+    def read_text(cls, run, agent, stage=Stage.BIRTH):
+        header, _, body = utility.read(paths.synapses(run, agent, stage)).partition(b"\n")
+        with instrumentation.time("parse"):
+            dimensions = cls.Dimensions.parse(header.decode(), agent)
+            synapses = Synapses.parse(body)
+            assert np.all(synapses.post_neurons != synapses.pre_neurons)
+            assert np.all(synapses.post_neurons >= dimensions.input_neuron_count)
+            synapses.weights /= dimensions.weight_max
+            instrumentation.count("synapses", len(synapses))
+            return cls(dimensions, synapses.fold(dimensions.neuron_count))
+
+    def __init__(self, dimensions, synapses):
         self.dimensions = dimensions
-        self.weights = WeightGraph(range(dimensions.neuron_count))
+        self.synapses = synapses
+        self._weights = None
+
+    @property
+    def weights(self):
+        if self._weights is None:
+            with instrumentation.time("build"):
+                self._weights = WeightGraph.from_arrays(
+                    range(self.dimensions.neuron_count),
+                    self.synapses.pre_neurons,
+                    self.synapses.post_neurons,
+                    self.synapses.weights)
+        return self._weights
 
     @property
     def neuron_count(self):
@@ -82,8 +116,159 @@ class Brain:
 
     @property
     def synapse_count(self):
-        return self.weights.edge_count
+        return len(self.synapses)
 
     @property
     def synapse_count_max(self):
-        return self.dimensions.neuron_count * (self.dimensions.neuron_count - self.dimensions.input_neuron_count - 1)
+        return self.dimensions.synapse_count_max
+
+    def get_weight_matrix(self):
+        return self.synapses.get_matrix(self.dimensions.neuron_count)
+
+    def get_weight_offsets(self):
+        return self.synapses.get_offsets(self.dimensions.neuron_count)
+
+
+def _read_index_entry(key):
+    run, agent, stage = key
+    try:
+        brain = Brain.read_text(run, agent, stage)
+    except FileNotFoundError:
+        return {"agent": agent, "present": False, **dict.fromkeys(BrainIndex.COLUMNS[2:], 0)}, None
+    row = {
+        "agent": agent,
+        "present": True,
+        "neuron_count": brain.dimensions.neuron_count,
+        "input_neuron_count": brain.dimensions.input_neuron_count,
+        "output_neuron_count": brain.dimensions.output_neuron_count,
+        "weight_max": brain.dimensions.weight_max,
+        "header_synapse_count": brain.dimensions.synapse_count,
+        "synapse_count": brain.synapse_count
+    }
+    return row, brain.synapses
+
+
+def _read_index_entries(run, stage, jobs):
+    keys = [(run, agent, stage) for agent in utility.get_agents(run)]
+    if jobs == 1:
+        yield from map(_read_index_entry, keys)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        yield from pool.imap(_read_index_entry, keys, max(1, len(keys) // (jobs * 4)))
+
+
+def is_stale(run, stage, directory):
+    suffixes = (f"_{stage.value}.txt", f"_{stage.value}.txt.gz")
+    return utility.is_stale(directory, os.path.dirname(paths.synapses(run, 1, stage)), suffixes)
+
+
+class BrainIndex:
+    COLUMNS = (
+        "agent",
+        "present",
+        "neuron_count",
+        "input_neuron_count",
+        "output_neuron_count",
+        "weight_max",
+        "header_synapse_count",
+        "synapse_count"
+    )
+
+    @classmethod
+    def read(cls, run, stage):
+        directory = paths.brain_index(run, stage)
+        if not os.path.isdir(directory) or is_stale(run, stage, directory):
+            return None
+        return cls(Table.read(directory))
+
+    def __init__(self, table):
+        self.table = table
+
+    def write(self, run, stage):
+        self.table.write(paths.brain_index(run, stage))
+
+    def _get_row(self, agent):
+        row = agent - 1
+        if not 0 <= row < len(self.table) or self.table["agent"][row] != agent or not self.table["present"][row]:
+            raise FileNotFoundError
+        return row
+
+    def get_dimensions(self, agent):
+        row = self._get_row(agent)
+        return Brain.Dimensions(
+            int(self.table["neuron_count"][row]),
+            int(self.table["input_neuron_count"][row]),
+            int(self.table["output_neuron_count"][row]),
+            float(self.table["weight_max"][row]),
+            int(self.table["header_synapse_count"][row]))
+
+    def get_synapse_count(self, agent):
+        return int(self.table["synapse_count"][self._get_row(agent)])
+
+
+class SynapseStore:
+    DTYPES = {
+        "pre_neuron": np.int32,
+        "post_neuron": np.int32,
+        "weight": np.float64,
+        "learning_rate": np.float64
+    }
+
+    @classmethod
+    def build(cls, run, stage, jobs=1):
+        rows = []
+        with TableWriter(paths.packed_synapses(run, stage), cls.DTYPES) as writer:
+            for row, synapses in _read_index_entries(run, stage, jobs):
+                row["offset"] = writer.count
+                rows.append(row)
+                if synapses is not None:
+                    writer.append({
+                        "pre_neuron": synapses.pre_neurons,
+                        "post_neuron": synapses.post_neurons,
+                        "weight": synapses.weights,
+                        "learning_rate": synapses.learning_rates
+                    })
+        index = BrainIndex(Table.from_rows((*BrainIndex.COLUMNS, "offset"), rows))
+        index.write(run, stage)
+        get_brain_index.cache_clear()
+        get_synapse_store.cache_clear()
+        return cls(index, Table.read(paths.packed_synapses(run, stage)))
+
+    @classmethod
+    def read(cls, run, stage):
+        index = get_brain_index(run, stage)
+        directory = paths.packed_synapses(run, stage)
+        if index is None or "offset" not in index.table.columns or not os.path.isdir(directory):
+            return None
+        if is_stale(run, stage, directory):
+            return None
+        return cls(index, Table.read(directory))
+
+    def __init__(self, index, table):
+        self.index = index
+        self.table = table
+
+    def read_synapses(self, agent):
+        row = self.index._get_row(agent)
+        start = int(self.index.table["offset"][row])
+        stop = start + int(self.index.table["synapse_count"][row])
+        return Synapses(
+            self.table["pre_neuron"][start:stop],
+            self.table["post_neuron"][start:stop],
+            self.table["weight"][start:stop],
+            self.table["learning_rate"][start:stop])
+
+    def read_brain(self, agent):
+        synapses = self.read_synapses(agent)
+        instrumentation.count("synapses", len(synapses))
+        return Brain(self.index.get_dimensions(agent), synapses)
+
+
+@functools.lru_cache(maxsize=8)
+def get_brain_index(run, stage):
+    return BrainIndex.read(run, stage)
+
+
+@functools.lru_cache(maxsize=8)
+def get_synapse_store(run, stage):
+    return SynapseStore.read(run, stage)
@@ -1,8 +1,13 @@
 import collections
 import enum
+import functools
+
+import numpy as np
 
 from . import paths
 from . import utility
+from .instrumentation import instrumentation
+from .table import Table
 
 
 class Event:
@@ -21,6 +26,8 @@ class Event:
         def has_parents(self):
             return self in {self.BIRTH, self.VIRTUAL}
 
+    __slots__ = ("time", "type", "agent", "parents")
+
     @classmethod
     def parse(cls, line):
         chunks = line.split()
@@ -29,10 +36,7 @@ class Event:
         agent = int(chunks[2])
         parents = None
         if type_.has_parents():
-            parents = {
-                int(chunks[3]),
-                int(chunks[4])
-            }
+            parents = (int(chunks[3]), int(chunks[4]))
         return cls(time, type_, agent, parents)
 
     @classmethod
@@ -50,7 +54,113 @@ class Event:
 
 
 def get_events(run):
+    index = get_event_index(run)
     events = collections.defaultdict(list)
-    for event in Event.read(run):
+    for position in range(len(index)):
+        event = index.get_event(position)
         events[event.time].append(event)
     return events
+
+
+class EventIndex:
+    TABLE_NAME = "Events"
+    TYPES = tuple(Event.Type)
+    NO_PARENT = -1
+
+    @classmethod
+    def get_codes(cls, predicate):
+        return [code for code, type_ in enumerate(cls.TYPES) if predicate(type_)]
+
+    @classmethod
+    def parse(cls, lines):
+        codes = {type_.value.encode(): code for code, type_ in enumerate(cls.TYPES)}
+        rows = []
+        for line in lines:
+            chunks = line.split()
+            if not chunks:
+                continue
+            if len(chunks) >= 5:
+                rows.append((int(chunks[0]), codes[chunks[1]], int(chunks[2]), int(chunks[3]), int(chunks[4])))
+            else:
+                rows.append((int(chunks[0]), codes[chunks[1]], int(chunks[2]), cls.NO_PARENT, cls.NO_PARENT))
+        columns = np.array(rows, dtype=np.int64).reshape(-1, 5)
+        order = np.argsort(columns[:, 0], kind="stable")
+        return cls(*columns[order].T)
+
+    @classmethod
+    def read_text(cls, run):
+        data = utility.read(paths.events(run))
+        with instrumentation.time("parse"):
+            return cls.parse(data.splitlines()[1:])
+
+    @classmethod
+    def read(cls, run):
+        table = utility.read_table(paths.events(run), cls.TABLE_NAME)
+        if table is None:
+            return cls.read_text(run)
+        return cls(table["time"], table["type"], table["agent"], table["parent1"], table["parent2"])
+
+    def __init__(self, times, types, agents, parents1, parents2):
+        self.times = times
+        self.types = types
+        self.agents = agents
+        self.parents1 = parents1
+        self.parents2 = parents2
+        self.offsets = np.searchsorted(times, np.arange(times[-1] + 2 if len(times) > 0 else 1))
+
+    def __len__(self):
+        return len(self.times)
+
+    def get_event(self, index):
+        type_ = self.TYPES[self.types[index]]
+        parents = (int(self.parents1[index]), int(self.parents2[index])) if type_.has_parents() else None
+        return Event(int(self.times[index]), type_, int(self.agents[index]), parents)
+
+    def to_records(self):
+        return np.rec.fromarrays(
+            (self.times, self.types, self.agents, self.parents1, self.parents2),
+            names=("time", "type", "agent", "parent1", "parent2"))
+
+    def to_table(self):
+        return Table({
+            "time": self.times,
+            "type": self.types,
+            "agent": self.agents,
+            "parent1": self.parents1,
+            "parent2": self.parents2
+        })
+
+    def get_range(self, time):
+        if time + 1 >= len(self.offsets):
+            return len(self), len(self)
+        return self.offsets[time], self.offsets[time + 1]
+
+    def get_mask(self, predicate):
+        return np.isin(self.types, self.get_codes(predicate))
+
+    def count(self, type_, time_count):
+        times = self.times[self.types == self.TYPES.index(type_)]
+        return np.bincount(times[times < time_count], minlength=time_count)
+
+    def get_intervals(self, initial_agents, end_time):
+        initial_agents = np.asarray(initial_agents, dtype=np.int64)
+        added = self.get_mask(Event.Type.adds_agent)
+        removed = self.get_mask(Event.Type.removes_agent)
+        agents = np.union1d(initial_agents, self.agents[added])
+        starts = np.full(len(agents), end_time + 1)
+        np.minimum.at(starts, np.searchsorted(agents, self.agents[added]), self.times[added])
+        starts[np.searchsorted(agents, initial_agents)] = 0
+        stops = np.full(len(agents), end_time + 1)
+        removed_agents = self.agents[removed]
+        known = np.isin(removed_agents, agents)
+        stops[np.searchsorted(agents, removed_agents[known])] = self.times[removed][known]
+        return agents, starts, stops
+
+    def get_population(self, time, initial_agents, end_time):
+        agents, starts, stops = self.get_intervals(initial_agents, end_time)
+        return agents[(starts <= time) & (time < stops)]
+
+
+@functools.lru_cache(maxsize=4)
+def get_event_index(run):
+    return EventIndex.read(run)
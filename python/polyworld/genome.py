@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+
+from . import paths
+from . import utility
+from .instrumentation import instrumentation
+
+
+def read_genome(run, agent):
+    data = utility.read(paths.genome(run, agent))
+    with instrumentation.time("parse"):
+        return np.array(data.split(), dtype=np.uint8)
+
+
+def read_genomes(run):
+    path = paths.genomes(run)
+    if os.path.exists(path) and not utility.is_stale(path, os.path.dirname(paths.genome(run, 1)), (".txt", ".txt.gz")):
+        return np.load(path, mmap_mode="r")
+    genomes = np.stack([read_genome(run, agent) for agent in utility.get_agents(run)])
+    try:
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.save(f, genomes)
+        os.replace(temporary_path, path)
+    except OSError:
+        return genomes
+    return np.load(path, mmap_mode="r")
+
+
+def get_gene_indices(run, regex):
+    with utility.open(paths.gene_indices(run)) as f:
+        return [index for index, line in enumerate(f) if regex.search(line)]
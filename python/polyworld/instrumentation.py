@@ -0,0 +1,108 @@
+import collections
+import contextlib
+import json
+import threading
+import time
+
+STAGES = ("read", "decompress", "parse", "build", "wait", "compute")
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled = False
+        self.times = collections.defaultdict(float)
+        self.counters = collections.defaultdict(int)
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __str__(self):
+        times = " ".join(f"{stage}={self.times[stage]:.3f}" for stage in STAGES)
+        counters = " ".join(f"{name}={value}" for name, value in sorted(self.counters.items()))
+        return f"agents={len(self.records)} {times} {counters}".rstrip()
+
+    @property
+    def _record(self):
+        return getattr(self._local, "record", None)
+
+    @_record.setter
+    def _record(self, record):
+        self._local.record = record
+
+    def reset(self):
+        enabled = self.enabled
+        self.__init__()
+        self.enabled = enabled
+
+    def add_time(self, stage, seconds):
+        if not self.enabled:
+            return
+        if self._record is None:
+            with self._lock:
+                self.times[stage] += seconds
+        else:
+            times = self._record["times"]
+            times[stage] = times.get(stage, 0.0) + seconds
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        if self._record is None:
+            with self._lock:
+                self.counters[name] += value
+        else:
+            counters = self._record["counters"]
+            counters[name] = counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def record(self, function, **labels):
+        record = {**labels, "times": {}, "counters": {}}
+        self._record = record
+        start = time.perf_counter()
+        try:
+            value = function()
+        finally:
+            self._record = None
+        elapsed = time.perf_counter() - start
+        times = record["times"]
+        times["compute"] = max(0.0, elapsed - sum(times.values()))
+        record["total"] = elapsed
+        return value, record
+
+    def merge(self, record, other):
+        for stage, seconds in other["times"].items():
+            record["times"][stage] = record["times"].get(stage, 0.0) + seconds
+        for name, value in other["counters"].items():
+            record["counters"][name] = record["counters"].get(name, 0) + value
+
+    def add_record(self, record):
+        with self._lock:
+            for stage, seconds in record["times"].items():
+                self.times[stage] += seconds
+            for name, value in record["counters"].items():
+                self.counters[name] += value
+            self.records.append(record)
+
+    def to_dict(self):
+        return {
+            "times": dict(self.times),
+            "counters": dict(self.counters),
+            "agents": self.records
+        }
+
+    def write(self, file):
+        json.dump(self.to_dict(), file, indent=2)
+        file.write("\n")
+
+
+instrumentation = Instrumentation()
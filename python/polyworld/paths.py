@@ -5,6 +5,10 @@ def events(run):
     return os.path.join(run, "BirthsDeaths.log")
 
 
+def brain_index(run, stage):
+    return os.path.join(run, "brain", f"index_{stage.value}")
+
+
 def end_time(run):
     return os.path.join(run, "endStep.txt")
 
@@ -25,13 +29,25 @@ def genome(run, agent):
     return os.path.join(run, "genome", "agents", f"genome_{agent}.txt")
 
 
+def genomes(run):
+    return os.path.join(run, "genome", "genomes.npy")
+
+
 def lifespans(run):
     return os.path.join(run, "lifespans.txt")
 
 
+def packed_synapses(run, stage):
+    return os.path.join(run, "brain", f"packed_{stage.value}")
+
+
 def population(run):
     return os.path.join(run, "population.txt")
 
 
 def synapses(run, agent, stage):
     return os.path.join(run, "brain", "synapses", f"synapses_{agent}_{stage.value}.txt")
+
+
+def table(path, table_name):
+    return os.path.join(f"{path}.columns", table_name)
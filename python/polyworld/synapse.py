@@ -1,4 +1,9 @@
+import numpy as np
+
+
 class Synapse:
+    __slots__ = ("pre_neuron", "post_neuron", "weight", "learning_rate")
+
     @classmethod
     def parse(cls, line):
         chunks = line.split()
@@ -13,3 +18,46 @@ class Synapse:
         self.post_neuron = post_neuron
         self.weight = weight
         self.learning_rate = learning_rate
+
+
+class Synapses:
+    @classmethod
+    def parse(cls, text):
+        values = np.array(text.split(), dtype=np.float64).reshape(-1, 4)
+        pre_neurons = values[:, 0].astype(np.int64)
+        post_neurons = values[:, 1].astype(np.int64)
+        return cls(pre_neurons, post_neurons, values[:, 2].copy(), values[:, 3].copy())
+
+    def __init__(self, pre_neurons, post_neurons, weights, learning_rates):
+        self.pre_neurons = pre_neurons
+        self.post_neurons = post_neurons
+        self.weights = weights
+        self.learning_rates = learning_rates
+
+    def __len__(self):
+        return len(self.weights)
+
+    def fold(self, neuron_count):
+        keys = self.pre_neurons * neuron_count + self.post_neurons
+        keys, indices, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        weights = np.bincount(inverse.ravel(), self.weights, len(keys))
+        present = weights != 0.0
+        keys = keys[present]
+        return type(self)(
+            keys // neuron_count,
+            keys % neuron_count,
+            weights[present],
+            self.learning_rates[indices[present]])
+
+    def to_records(self):
+        return np.rec.fromarrays(
+            (self.pre_neurons, self.post_neurons, self.weights, self.learning_rates),
+            names=("pre_neuron", "post_neuron", "weight", "learning_rate"))
+
+    def get_offsets(self, neuron_count):
+        return np.searchsorted(self.pre_neurons, np.arange(neuron_count + 1))
+
+    def get_matrix(self, neuron_count):
+        matrix = np.zeros((neuron_count, neuron_count))
+        matrix[self.pre_neurons, self.post_neurons] = self.weights
+        return matrix
@@ -0,0 +1,98 @@
+import os
+import shutil
+
+import numpy as np
+
+EXTENSION = ".npy"
+
+
+class Table:
+    @classmethod
+    def from_rows(cls, names, rows):
+        rows = list(rows)
+        return cls({name: np.array([row[name] for row in rows]) for name in names})
+
+    @classmethod
+    def read(cls, directory):
+        columns = {}
+        for file_name in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(file_name)
+            if extension == EXTENSION:
+                columns[name] = np.load(os.path.join(directory, file_name), mmap_mode="r")
+        return cls(columns)
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def rows(self):
+        names = list(self.columns)
+        for values in zip(*(self.columns[name].tolist() for name in names)):
+            yield dict(zip(names, values))
+
+    def write(self, directory):
+        temporary_directory = f"{directory}.tmp"
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        os.makedirs(temporary_directory)
+        for name, values in self.columns.items():
+            np.save(os.path.join(temporary_directory, f"{name}{EXTENSION}"), values)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.rename(temporary_directory, directory)
+
+
+class TableWriter:
+    RAW_EXTENSION = ".raw"
+
+    def __init__(self, directory, dtypes):
+        self.directory = directory
+        self.temporary_directory = f"{directory}.tmp"
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in dtypes.items()}
+        self.count = 0
+        shutil.rmtree(self.temporary_directory, ignore_errors=True)
+        os.makedirs(self.temporary_directory)
+        self.files = {name: open(self._get_path(name, self.RAW_EXTENSION), "wb") for name in self.dtypes}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            for file in self.files.values():
+                file.close()
+            shutil.rmtree(self.temporary_directory, ignore_errors=True)
+
+    def _get_path(self, name, extension):
+        return os.path.join(self.temporary_directory, f"{name}{extension}")
+
+    def append(self, columns):
+        counts = set()
+        for name, file in self.files.items():
+            values = np.ascontiguousarray(columns[name], self.dtypes[name])
+            values.tofile(file)
+            counts.add(len(values))
+        if len(counts) != 1:
+            raise ValueError
+        self.count += counts.pop()
+
+    def close(self):
+        for name, file in self.files.items():
+            file.close()
+            header = {
+                "descr": np.lib.format.dtype_to_descr(self.dtypes[name]),
+                "fortran_order": False,
+                "shape": (self.count,)
+            }
+            with open(self._get_path(name, EXTENSION), "wb") as f:
+                np.lib.format.write_array_header_1_0(f, header)
+                with open(file.name, "rb") as raw:
+                    shutil.copyfileobj(raw, f)
+            os.remove(file.name)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.rename(self.temporary_directory, self.directory)
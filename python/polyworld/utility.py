@@ -1,29 +1,135 @@
 import builtins
 import gzip
 import os
-
-import datalib
+import shutil
+import subprocess
+import time
 
 from . import paths
+from .instrumentation import instrumentation
+from .table import Table
 
+try:
+    from zlib_ng import gzip_ng as fast_gzip
+except ImportError:
+    fast_gzip = gzip
 
-def open(path):
-    if path.lower().endswith(".gz"):
-        gzip_path = path
-    else:
+PIGZ = shutil.which("pigz")
+PIGZ_SIZE = 2 ** 20
+
+
+class IOStatistics:
+    def __init__(self):
+        self.file_count = 0
+        self.bytes_read = 0
+        self.read_time = 0.0
+        self.decompression_time = 0.0
+
+    def __str__(self):
+        return (
+            f"files={self.file_count} "
+            f"bytes={self.bytes_read} "
+            f"read_time={self.read_time:.3f} "
+            f"decompression_time={self.decompression_time:.3f}")
+
+    def reset(self):
+        self.__init__()
+
+
+io_statistics = IOStatistics()
+
+
+def resolve(path):
+    if not path.lower().endswith(".gz"):
         if os.path.exists(path):
-            return builtins.open(path)
-        gzip_path = f"{path}.gz"
-    if os.path.exists(gzip_path):
-        return gzip.open(gzip_path, "rt")
+            return path
+        path = f"{path}.gz"
+    if os.path.exists(path):
+        return path
     raise FileNotFoundError
 
 
-def parse(path, table_name):
+def open(path):
+    path = resolve(path)
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt")
+    return builtins.open(path)
+
+
+def decompress(data):
+    if PIGZ is not None and len(data) >= PIGZ_SIZE:
+        return subprocess.run((PIGZ, "-dc"), input=data, stdout=subprocess.PIPE, check=True).stdout
+    return fast_gzip.decompress(data)
+
+
+def read(path):
+    path = resolve(path)
+    start = time.perf_counter()
+    with builtins.open(path, "rb") as f:
+        data = f.read()
+    read_time = time.perf_counter() - start
+    io_statistics.read_time += read_time
+    io_statistics.file_count += 1
+    io_statistics.bytes_read += len(data)
+    instrumentation.add_time("read", read_time)
+    instrumentation.count("files")
+    instrumentation.count("bytes_read", len(data))
+    if path.lower().endswith(".gz"):
+        start = time.perf_counter()
+        data = decompress(data)
+        decompression_time = time.perf_counter() - start
+        io_statistics.decompression_time += decompression_time
+        instrumentation.add_time("decompress", decompression_time)
+    return data
+
+
+def get_mtime(directory, suffixes):
+    mtime = os.path.getmtime(directory)
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(suffixes):
+                mtime = max(mtime, entry.stat().st_mtime)
+    return mtime
+
+
+def is_stale(path, directory, suffixes):
+    try:
+        return get_mtime(directory, suffixes) > os.path.getmtime(path)
+    except FileNotFoundError:
+        return False
+
+
+def read_table(path, table_name):
+    directory = paths.table(path, table_name)
+    if not os.path.isdir(directory):
+        return None
+    try:
+        if os.path.getmtime(resolve(path)) > os.path.getmtime(directory):
+            return None
+    except FileNotFoundError:
+        pass
+    return Table.read(directory)
+
+
+def parse_text(path, table_name):
+    import datalib
+
     return datalib.parse(path, (table_name,), True)[table_name]
 
 
+def parse(path, table_name):
+    table = read_table(path, table_name)
+    if table is not None:
+        return table
+    return parse_text(path, table_name)
+
+
 def parse_digest(path, table_name):
+    table = read_table(path, table_name)
+    if table is not None:
+        return {"nrows": len(table)}
+    import datalib
+
     return datalib.parse_digest(path)["tables"][table_name]
 
 
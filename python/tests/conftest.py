@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import polyworld as pw
+
+GENE_NAMES = ("Size", "Strength", "Size", "Bias")
+
+
+@pytest.fixture
+def run(tmp_path):
+    run = str(tmp_path / "run")
+    agent_count = 6
+    rng = np.random.default_rng(0)
+    os.makedirs(run)
+    with open(pw.paths.end_time(run), "w") as f:
+        f.write("10\n")
+    pw.Table({
+        "Agent": np.arange(1, agent_count + 1),
+        "BirthStep": np.zeros(agent_count, dtype=np.int64),
+        "BirthReason": np.array(["SIMINIT"] * agent_count),
+        "DeathStep": np.full(agent_count, 10),
+        "DeathReason": np.array(["SIMEND"] * agent_count)
+    }).write(pw.paths.table(pw.paths.lifespans(run), "LifeSpans"))
+    os.makedirs(os.path.dirname(pw.paths.genome(run, 1)))
+    os.makedirs(os.path.dirname(pw.paths.gene_indices(run)))
+    with open(pw.paths.gene_indices(run), "w") as f:
+        f.writelines(f"{name}_{index}\n" for index, name in enumerate(GENE_NAMES))
+    for agent in range(1, agent_count + 1):
+        with open(pw.paths.genome(run, agent), "w") as f:
+            f.writelines(f"{gene}\n" for gene in rng.integers(0, 256, len(GENE_NAMES)).tolist())
+    return run
+
+
+def write_data(path, seed):
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        f.write("time " + " ".join(f"value{index}" for index in range(6)) + "\n")
+        for time in range(20):
+            f.write(f"{time} " + " ".join(map(str, rng.integers(1, 256, 6).tolist())) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def data(tmp_path):
+    return write_data(tmp_path / "actual.txt", 0), write_data(tmp_path / "neutral.txt", 1)
@@ -0,0 +1,25 @@
+import metrics
+
+
+def calculate(args):
+    return dict(metrics.parse_args(args).calculate().items())
+
+
+def test_gene_cache_key_includes_regex(run, tmp_path):
+    cache = str(tmp_path / "cache")
+    calculate(["Gene", run, "Size", "--cache", cache])
+    assert calculate(["Gene", run, "Strength", "--cache", cache]) == calculate(["Gene", run, "Strength"])
+
+
+def test_diversity_cache(data, tmp_path):
+    cache = str(tmp_path / "cache")
+    expected = calculate(["Diversity", data[0], "2..5"])
+    assert calculate(["Diversity", data[0], "2..5", "--cache", cache]) == expected
+    assert calculate(["Diversity", data[0], "2..5", "--cache", cache]) == expected
+
+
+def test_selection_cache(data, tmp_path):
+    cache = str(tmp_path / "cache")
+    expected = calculate(["Selection", *data, "1..4"])
+    assert calculate(["Selection", *data, "1..4", "--cache", cache]) == expected
+    assert calculate(["Selection", *data, "1..4", "--cache", cache]) == expected
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+import metrics
+import polyworld as pw
+
+
+def test_checkpoint_arguments_include_regex(run, tmp_path):
+    output = str(tmp_path / "gene.npy")
+    metric = metrics.parse_args(["Gene", run, "Size", "--output", output, "--output-format", "npy"])
+    agents = len(pw.get_agents(run))
+    metric._write_checkpoint(metric.get_checkpoint_path(output), np.ones(agents), np.full(agents, np.nan), np.ones(agents, dtype=bool), False, False)
+    assert len(metric.read_checkpoint(metric.get_checkpoint_path(output))) == agents
+    metric = metrics.parse_args(["Gene", run, "Strength", "--output", output, "--output-format", "npy", "--resume"])
+    with pytest.raises(ValueError):
+        metric.stream(output)
+
+
+@pytest.mark.parametrize("options", (["--resume"], ["--output", "gene.txt", "--cache", "cache"]))
+def test_ignored_options(run, options):
+    with pytest.raises(SystemExit):
+        metrics.parse_args(["Gene", run, "Size", *options])
@@ -0,0 +1,10 @@
+import pytest
+
+import metrics
+
+
+@pytest.mark.parametrize("options", (["--samples", "4"], ["--tolerance", "0.1"]))
+def test_local_sampling_options(run, options):
+    with pytest.raises(SystemExit):
+        metrics.parse_args(["Efficiency", run, "local", "birth", *options])
+    assert metrics.parse_args(["Efficiency", run, "global", "birth", *options]).sampled
@@ -0,0 +1,16 @@
+import metrics
+import polyworld as pw
+
+
+def test_genomes_read_once(run, monkeypatch):
+    calls = []
+    read_genomes = pw.read_genomes
+
+    def read_genomes_counted(run):
+        calls.append(run)
+        return read_genomes(run)
+
+    monkeypatch.setattr(pw, "read_genomes", read_genomes_counted)
+    series = metrics.parse_args(["Gene", run, "Size"]).calculate()
+    assert len(series) == len(pw.get_agents(run))
+    assert calls == [run]
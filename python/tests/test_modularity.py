@@ -0,0 +1,30 @@
+import random
+
+import numpy as np
+
+from metrics.modularity import get_partition
+
+
+def get_ring(clique_count, clique_size):
+    edges = []
+    for clique in range(clique_count):
+        start = clique * clique_size
+        vertices = range(start, start + clique_size)
+        edges.extend((i, j) for i in vertices for j in vertices if i != j)
+        edges.append((start, (start + clique_size) % (clique_count * clique_size)))
+    sources, targets = np.array(edges).T
+    return clique_count * clique_size, sources, targets, np.ones(len(edges))
+
+
+def get_result(seed, vertex_count, sources, targets, weights):
+    random.seed(seed)
+    partition = get_partition(vertex_count, sources, targets, weights)
+    assert abs(partition.get_modularity() - partition.modularity) < 1e-12
+    return partition.labels, partition.communities.tolist(), partition.modularity
+
+
+def test_seeded_equal_weights():
+    ring = get_ring(8, 4)
+    results = [get_result(seed, *ring) for seed in range(10)]
+    assert [get_result(seed, *ring) for seed in range(10)] == results
+    assert len(set(repr(result) for result in results)) > 1